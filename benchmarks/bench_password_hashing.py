@@ -0,0 +1,67 @@
+"""
+Login throughput with bcrypt verification on the event loop versus on the
+password hashing pool, together with the worst stall seen by other requests
+on the same loop while the burst is running.
+
+Run from the project root::
+
+    python -m benchmarks.bench_password_hashing [requests]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.services.auth import auth_service
+
+
+async def heartbeat(ticks: list) -> None:
+    while True:
+        ticks.append(time.perf_counter())
+        await asyncio.sleep(0.01)
+
+
+async def run(login, requests: int) -> tuple[float, float]:
+    ticks = []
+    ticker = asyncio.create_task(heartbeat(ticks))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(requests)))
+    end = time.perf_counter()
+    ticker.cancel()
+    ticks.append(end)
+    stall = max(b - a for a, b in zip(ticks, ticks[1:])) - 0.01
+    return end - start, max(stall, 0.0)
+
+
+async def main(requests: int) -> None:
+    hashed = auth_service.pwd_context.hash("secret")
+
+    async def login_on_loop():
+        auth_service.pwd_context.verify("secret", hashed)
+
+    async def login_on_pool():
+        await auth_service.verify_password("secret", hashed)
+
+    elapsed, stall = await run(login_on_loop, requests)
+    print(
+        f"event loop        {requests / elapsed:8.1f} logins/s"
+        f"   max loop stall {stall * 1000:8.1f} ms"
+    )
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        auth_service.pwd_executor = ThreadPoolExecutor(max_workers=workers)
+        elapsed, stall = await run(login_on_pool, requests)
+        auth_service.pwd_executor.shutdown()
+        print(
+            f"pool, {workers:2d} workers  {requests / elapsed:8.1f} logins/s"
+            f"   max loop stall {stall * 1000:8.1f} ms"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 64))
@@ -0,0 +1,71 @@
+"""
+Serialization cost of a page of 100 notes with 3 tags each: FastAPI's
+``response_model`` path (``orm_mode`` validation, ``jsonable_encoder``, stdlib
+JSON) versus the projection + orjson fast path of ``src.services.serialization``.
+
+Run from the project root::
+
+    python -m benchmarks.bench_serialization [iterations]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.database.models import Note, Tag
+from src.schemas import NoteResponse
+from src.services.serialization import dump_notes
+
+PAGE = 100
+
+
+def page() -> List[Note]:
+    tags = [Tag(id=i, name=f"tag{i}") for i in range(1, 11)]
+    start = datetime(2023, 3, 1)
+    return [
+        Note(
+            id=i,
+            title=f"note {i}",
+            description="a description of the note " * 4,
+            done=i % 2 == 0,
+            created_at=start + timedelta(seconds=i),
+            tags=[tags[(i + k) % len(tags)] for k in range(3)],
+        )
+        for i in range(PAGE)
+    ]
+
+
+async def response_model(field, notes) -> bytes:
+    content = await serialize_response(field=field, response_content=notes)
+    return JSONResponse(content).body
+
+
+async def fast_path(field, notes) -> bytes:
+    return dump_notes(notes)
+
+
+async def timed(fn, field, notes, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await fn(field, notes)
+    return (time.perf_counter() - start) / iterations
+
+
+async def main(iterations: int) -> None:
+    notes = page()
+    field = create_response_field(name="Response_read_notes", type_=List[NoteResponse])
+    slow = await timed(response_model, field, notes, iterations)
+    fast = await timed(fast_path, field, notes, iterations)
+    print(f"page of {PAGE} notes with 3 tags each, {iterations} iterations")
+    print(f"response_model + json   {slow * 1e6:10.1f} us/page")
+    print(f"projection + orjson     {fast * 1e6:10.1f} us/page   ({slow / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
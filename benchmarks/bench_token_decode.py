@@ -0,0 +1,42 @@
+"""
+Cost of resolving the claims of a repeated bearer token: full ``jwt.decode``
+versus a lookup in the verified-token cache.
+
+Run from the project root::
+
+    python -m benchmarks.bench_token_decode [iterations]
+"""
+
+import asyncio
+import sys
+import timeit
+
+from jose import jwt
+
+from src.services.auth import auth_service
+from src.services.token_cache import TokenCache
+
+
+def main(iterations: int) -> None:
+    token = asyncio.run(
+        auth_service.create_access_token(data={"sub": "deadpool@example.com"})
+    )
+    cache = TokenCache(maxsize=1024)
+    cache.set(
+        token,
+        jwt.decode(token, auth_service.SECRET_KEY, algorithms=[auth_service.ALGORITHM]),
+    )
+
+    decode = timeit.timeit(
+        lambda: jwt.decode(
+            token, auth_service.SECRET_KEY, algorithms=[auth_service.ALGORITHM]
+        ),
+        number=iterations,
+    )
+    lookup = timeit.timeit(lambda: cache.get(token), number=iterations)
+    print(f"jwt.decode    {decode / iterations * 1e6:8.2f} us/token")
+    print(f"token cache   {lookup / iterations * 1e6:8.2f} us/token")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -1,10 +1,15 @@
-import redis.asyncio as redis
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
+from fastapi.staticfiles import StaticFiles
 
-from src.routes import notes, tags, auth, users
 from src.conf.config import settings
+from src.routes import notes, tags, auth, users, metrics
+from src.database.cache import pool
+from src.services.auth import auth_service
+from src.services.email import email_worker
+from src.services.revocations import revocations
+from src.services.storage import avatar_storage
+from src.services.user_cache import user_cache
 
 app = FastAPI()
 
@@ -22,19 +27,31 @@ app.include_router(auth.router, prefix="/api")
 app.include_router(tags.router, prefix="/api")
 app.include_router(notes.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
+app.include_router(metrics.router)
+
+if settings.avatar_storage == "local":
+    app.mount(
+        settings.avatar_storage_url,
+        StaticFiles(directory=settings.avatar_storage_path, check_dir=False),
+        name="media",
+    )
 
 
 @app.on_event("startup")
 async def startup():
-    r = await redis.Redis(
-        host=settings.redis_host,
-        port=settings.redis_port,
-        password=settings.redis_password,
-        db=0,
-        encoding="utf-8",
-        decode_responses=True,
-    )
-    await FastAPILimiter.init(r)
+    user_cache.start_listener()
+    revocations.start_listener()
+    email_worker.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await user_cache.stop_listener()
+    await revocations.stop_listener()
+    await email_worker.stop()
+    auth_service.pwd_executor.shutdown(wait=False)
+    avatar_storage.executor.shutdown(wait=False)
+    await pool.disconnect()
 
 
 @app.get("/")
@@ -0,0 +1,41 @@
+"""access path indexes
+
+Revision ID: 5c2e8f1a9b47
+Revises: 3fe823ab9309
+Create Date: 2026-10-18 09:12:40.318552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e8f1a9b47'
+down_revision = '3fe823ab9309'
+branch_labels = None
+depends_on = None
+
+# users.email is already covered by the unique index behind users_email_key
+
+INDEXES = [
+    ('ix_notes_user_id_created_at_id', 'notes', ['user_id', 'created_at', 'id']),
+    ('ix_tags_user_id_id', 'tags', ['user_id', 'id']),
+    ('ix_note_m2m_tag_note_id_tag_id', 'note_m2m_tag', ['note_id', 'tag_id']),
+    ('ix_note_m2m_tag_tag_id_note_id', 'note_m2m_tag', ['tag_id', 'note_id']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the tables writable while the indexes are built,
+    # but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,42 @@
+"""notes full text search
+
+Revision ID: 9d41b7c3e2a8
+Revises: 5c2e8f1a9b47
+Create Date: 2026-10-18 11:40:02.905117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d41b7c3e2a8'
+down_revision = '5c2e8f1a9b47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Generated by PostgreSQL on every INSERT and UPDATE of notes,
+    # see src.database.models for the SQLite counterpart used by the tests
+    op.execute(
+        "ALTER TABLE notes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B')) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notes_search_vector',
+            'notes',
+            ['search_vector'],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_notes_search_vector', table_name='notes', postgresql_concurrently=True
+        )
+    op.drop_column('notes', 'search_vector')
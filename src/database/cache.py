@@ -0,0 +1,14 @@
+import redis.asyncio as redis
+
+from src.conf.config import settings
+
+pool = redis.BlockingConnectionPool(
+    host=settings.redis_host,
+    port=settings.redis_port,
+    password=settings.redis_password,
+    db=0,
+    max_connections=settings.redis_max_connections,
+    timeout=settings.redis_pool_timeout,
+)
+
+redis_client = redis.Redis(connection_pool=pool)
@@ -1,18 +1,210 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+
+from fastapi import Depends
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.conf.config import settings
+from src.services.metrics import Histogram
+
+# upper bounds, in seconds, of the buckets of the connection wait time histogram
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waits for a usable connection,
+    including opening new connections and the pre-ping, and how many checkouts
+    time out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_time = Histogram(POOL_WAIT_BUCKETS)
+        self.timeouts = 0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_time.observe(time.perf_counter() - start)
+
+
+class ReplicaSession(AsyncSession):
+    """
+    Session on a read replica. When the replica cannot be connected to or drops
+    the connection, the statement is retried on ``primary``, which then serves
+    the rest of the session. Read-only: nothing is flushed or committed on it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.primary: AsyncSession | None = None
+        self.failed_over = False
+
+    async def _run(self, method: str, *args, **kwargs):
+        if not self.failed_over:
+            try:
+                return await getattr(super(), method)(*args, **kwargs)
+            except exc.DBAPIError as e:
+                if self.primary is None or not e.connection_invalidated:
+                    raise
+                self.failed_over = True
+        return await getattr(self.primary, method)(*args, **kwargs)
+
+    async def execute(self, *args, **kwargs):
+        return await self._run("execute", *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await self._run("scalar", *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await self._run("scalars", *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await self._run("get", *args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        return await self._run("stream", *args, **kwargs)
+
+
+class ReplicaSet:
+    """
+    Round-robin over the session factories of the read replicas. Sessions only
+    connect on their first query, so a request that is served from a cache never
+    takes a replica connection. A replica whose connection fails is skipped for
+    ``retry_after`` seconds, and the session that hit the failure carries on on
+    the primary.
+    """
+
+    def __init__(self, session_factories: list, retry_after: float):
+        self.session_factories = session_factories
+        self.retry_after = retry_after
+        self.down_until = [0.0] * len(session_factories)
+        self._next = 0
+
+    def session(self) -> AsyncSession | None:
+        """
+        Creates a session on the next available replica. The session is not
+        connected yet.
+
+        :return: The session, or None if no replica is configured or available.
+        :rtype: AsyncSession | None
+        """
+        now = time.monotonic()
+        for _ in range(len(self.session_factories)):
+            index = self._next
+            self._next = (index + 1) % len(self.session_factories)
+            if self.down_until[index] <= now:
+                return self.session_factories[index]()
+        return None
+
+    def mark_down(self, index: int) -> None:
+        """
+        Skips a replica for ``retry_after`` seconds.
+
+        :param index: The index of the replica.
+        :type index: int
+        """
+        self.down_until[index] = time.monotonic() + self.retry_after
+
+    def handle_error(self, index: int):
+        """
+        Returns a ``handle_error`` listener for the engine of a replica, which
+        marks the replica down when connecting to it fails or a connection is
+        lost, but not on errors of the queries themselves. Both kinds of
+        connection failure are flagged as ``connection_invalidated``, which is
+        what :class:`ReplicaSession` fails over on.
+
+        :param index: The index of the replica.
+        :type index: int
+        """
+
+        def handle_error(context) -> None:
+            if context.connection is None or context.is_disconnect:
+                print(context.original_exception)
+                context.is_disconnect = True
+                self.mark_down(index)
+
+        return handle_error
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+
+
+def _sessionmaker(engine, class_=AsyncSession):
+    return async_sessionmaker(
+        engine, class_=class_, autoflush=False, expire_on_commit=False
+    )
+
 
 SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+SessionLocal = _sessionmaker(engine)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+replica_engines = [_create_engine(url) for url in settings.sqlalchemy_replica_urls]
+replicas = ReplicaSet(
+    [_sessionmaker(replica, ReplicaSession) for replica in replica_engines],
+    settings.replica_retry_after,
+)
+for index, replica in enumerate(replica_engines):
+    event.listen(replica.sync_engine, "handle_error", replicas.handle_error(index))
 
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def get_read_db(db: AsyncSession = Depends(get_db)):
+    """
+    Session for read-only work, on one of the read replicas when any is
+    configured and available, on the primary otherwise. Replicas lag behind the
+    primary, so routes that read their own writes, or tag their responses with
+    a collection version, use :func:`get_db` instead. A replica session that
+    loses its replica carries on on the primary session.
+
+    :param db: The primary session of the request.
+    :type db: AsyncSession
+    """
+    replica = replicas.session()
+    if replica is None:
+        yield db
+        return
+    replica.primary = db
+    async with replica:
+        yield replica
+
+
+def pool_stats(pool: InstrumentedPool | None = None) -> dict:
+    """
+    Returns the live statistics of a connection pool.
+
+    :param pool: The pool, the one of the application engine by default.
+    :type pool: InstrumentedPool | None
+    :return: The pool statistics.
+    :rtype: dict
+    """
+    pool = pool or engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "timeouts": pool.timeouts,
+        "wait_seconds": pool.wait_time.stats(),
+    }
@@ -1,24 +1,40 @@
-from sqlalchemy import Column, Integer, String, Boolean, func, Table, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, func, Table, UniqueConstraint, Index, DDL, event
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql.schema import ForeignKey
 from sqlalchemy.sql.sqltypes import DateTime
 
 Base = declarative_base()
 
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds, so bound datetimes are stored
+# the same way, otherwise keyset comparisons against func.now() values skip rows.
+CreatedAt = DateTime().with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d "
+        "%(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
 note_m2m_tag = Table(
     "note_m2m_tag",
     Base.metadata,
     Column("id", Integer, primary_key=True),
     Column("note_id", Integer, ForeignKey("notes.id", ondelete="CASCADE")),
     Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE")),
+    Index("ix_note_m2m_tag_note_id_tag_id", "note_id", "tag_id"),
+    Index("ix_note_m2m_tag_tag_id_note_id", "tag_id", "note_id"),
 )
 
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("ix_notes_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     id = Column(Integer, primary_key=True)
     title = Column(String(50), nullable=False)
-    created_at = Column('created_at', DateTime, default=func.now())
+    created_at = Column('created_at', CreatedAt, default=func.now())
     description = Column(String(150), nullable=False)
     done = Column(Boolean, default=False)
     tags = relationship("Tag", secondary=note_m2m_tag, backref="notes")
@@ -26,10 +42,49 @@ class Note(Base):
     user = relationship('User', backref="notes")
 
 
+# Full-text search over notes is maintained by the database on every write: a generated
+# tsvector column with a GIN index on PostgreSQL, an external-content FTS5 table kept in
+# sync by triggers on SQLite. Neither is mapped, see src.repository.notes.search_notes.
+for statement in (
+    "ALTER TABLE notes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX ix_notes_search_vector ON notes USING GIN (search_vector)",
+):
+    event.listen(
+        Note.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql")
+    )
+
+for statement in (
+    "CREATE VIRTUAL TABLE notes_fts USING fts5("
+    "title, description, content='notes', content_rowid='id')",
+    "CREATE TRIGGER notes_fts_insert AFTER INSERT ON notes BEGIN "
+    "INSERT INTO notes_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER notes_fts_delete AFTER DELETE ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER notes_fts_update AFTER UPDATE OF title, description ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO notes_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+):
+    event.listen(
+        Note.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+event.listen(
+    Note.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS notes_fts").execute_if(dialect="sqlite"),
+)
+
+
 class Tag(Base):
     __tablename__ = "tags"
     __table_args__ = (
         UniqueConstraint('name', 'user_id', name='unique_tag_user'),
+        Index('ix_tags_user_id_id', 'user_id', 'id'),
     )
     id = Column(Integer, primary_key=True)
     name = Column(String(25), nullable=False)
@@ -47,3 +102,20 @@ class User(Base):
     avatar = Column(String(255), nullable=True)
     refresh_token = Column(String(255), nullable=True)
     confirmed = Column(Boolean, default=False)
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index('ix_email_outbox_next_attempt_at', 'next_attempt_at'),
+    )
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String(250), nullable=False)
+    username = Column(String(50))
+    host = Column(String(255), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # NULL once the email is sent or has used up its attempts
+    next_attempt_at = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    last_error = Column(String(255), nullable=True)
+    created_at = Column(DateTime, default=func.now())
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import EmailOutbox
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def add_confirmation_email(
+    email: str, username: str, host: str, db: AsyncSession
+) -> EmailOutbox:
+    """
+    Adds a confirmation email to the outbox without committing, so that it is
+    committed together with the rest of the caller's transaction, e.g. the new user.
+
+    :param email: The email address of the recipient.
+    :type email: str
+    :param username: The username to include in the email.
+    :type username: str
+    :param host: The base URL of the application, for the confirmation link.
+    :type host: str
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The outbox entry.
+    :rtype: EmailOutbox
+    """
+    entry = EmailOutbox(
+        recipient=email, username=username, host=host, next_attempt_at=_now()
+    )
+    db.add(entry)
+    return entry
+
+
+async def queue_confirmation_email(
+    email: str, username: str, host: str, db: AsyncSession
+) -> EmailOutbox:
+    """
+    Adds a confirmation email to the outbox and commits it.
+
+    :param email: The email address of the recipient.
+    :type email: str
+    :param username: The username to include in the email.
+    :type username: str
+    :param host: The base URL of the application, for the confirmation link.
+    :type host: str
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The outbox entry.
+    :rtype: EmailOutbox
+    """
+    entry = add_confirmation_email(email, username, host, db)
+    await db.commit()
+    return entry
+
+
+async def claim_due_emails(
+    limit: int, lease: timedelta, db: AsyncSession
+) -> List[EmailOutbox]:
+    """
+    Claims up to ``limit`` emails that are due. Each claimed email counts an attempt
+    and is leased for ``lease`` before it is sent, so an email whose sender crashes
+    is retried, and concurrent workers skip rows claimed by others. The lease must
+    outlast sending the whole batch, or another worker sends the rest again.
+
+    :param limit: The maximum number of emails to claim.
+    :type limit: int
+    :param lease: The delay before a claimed email becomes due again.
+    :type lease: timedelta
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The claimed emails.
+    :rtype: List[EmailOutbox]
+    """
+    now = _now()
+    result = await db.execute(
+        select(EmailOutbox)
+        .where(EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    emails = list(result.scalars())
+    for email in emails:
+        email.attempts += 1
+        email.next_attempt_at = now + lease
+    await db.commit()
+    return emails
+
+
+async def mark_sent(email: EmailOutbox, db: AsyncSession) -> None:
+    """
+    Marks an email as sent.
+
+    :param email: The sent email.
+    :type email: EmailOutbox
+    :param db: The database session.
+    :type db: AsyncSession
+    """
+    email.sent_at = _now()
+    email.next_attempt_at = None
+    email.last_error = None
+    await db.commit()
+
+
+async def mark_failed(
+    email: EmailOutbox, error: str, retry_after: timedelta | None, db: AsyncSession
+) -> None:
+    """
+    Records a failed attempt and schedules the next one.
+
+    :param email: The email that could not be sent.
+    :type email: EmailOutbox
+    :param error: The error of the attempt.
+    :type error: str
+    :param retry_after: The delay before the next attempt, or None to stop retrying
+        the email.
+    :type retry_after: timedelta | None
+    :param db: The database session.
+    :type db: AsyncSession
+    """
+    email.last_error = error[:255]
+    email.next_attempt_at = _now() + retry_after if retry_after is not None else None
+    await db.commit()
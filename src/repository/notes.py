@@ -1,13 +1,81 @@
-from typing import List
+from datetime import datetime
+from typing import AsyncIterator, List
 
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    and_,
+    column,
+    delete,
+    distinct,
+    exists,
+    func,
+    insert,
+    literal_column,
+    select,
+    table,
+    tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from src.database.models import Note, Tag, User
-from src.schemas import NoteModel, NoteUpdate, NoteStatusUpdate
+from src.database.models import Note, Tag, User, note_m2m_tag
+from src.repository import tags as repository_tags
+from src.schemas import (
+    NoteModel,
+    NoteUpdate,
+    NoteStatusUpdate,
+    NoteBulkUpdate,
+    NoteImport,
+)
+from src.services.collection_versions import NOTES, TAGS, collection_versions
 
+# SQLite FTS5 index over notes, created by the DDL hooks in src.database.models
+notes_fts = table("notes_fts", column("rowid"))
 
-async def get_notes(skip: int, limit: int, user: User, db: Session) -> List[Note]:
+
+async def _get_user_note(note_id: int, user: User, db: AsyncSession) -> Note | None:
+    stmt = (
+        select(Note)
+        .options(selectinload(Note.tags))
+        .where(and_(Note.id == note_id, Note.user_id == user.id))
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def _get_user_tags(tag_ids: List[int], user: User, db: AsyncSession) -> List[Tag]:
+    stmt = select(Tag).where(and_(Tag.id.in_(tag_ids), Tag.user_id == user.id))
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+
+def _tagged(tag_ids: List[int], match_all: bool):
+    """
+    Builds the condition selecting notes that carry any, or all, of the given tags.
+    ``any`` is a semi-join on the (note_id, tag_id) index, ``all`` a GROUP BY/HAVING
+    over the (tag_id, note_id) index, so neither loads tags into the application.
+    """
+    tag_ids = set(tag_ids)
+    if not match_all:
+        return exists().where(
+            and_(note_m2m_tag.c.note_id == Note.id, note_m2m_tag.c.tag_id.in_(tag_ids))
+        )
+    return Note.id.in_(
+        select(note_m2m_tag.c.note_id)
+        .where(note_m2m_tag.c.tag_id.in_(tag_ids))
+        .group_by(note_m2m_tag.c.note_id)
+        .having(func.count(distinct(note_m2m_tag.c.tag_id)) == len(tag_ids))
+    )
+
+
+async def get_notes(
+    skip: int,
+    limit: int,
+    user: User,
+    db: AsyncSession,
+    tag_ids: List[int] | None = None,
+    match_all: bool = False,
+) -> List[Note]:
     """
     Retrieves a list of notes for a specific user with specified pagination parameters.
 
@@ -18,16 +86,60 @@ async def get_notes(skip: int, limit: int, user: User, db: Session) -> List[Note
     :param user: The user to retrieve notes for.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
+    :param tag_ids: Only return notes tagged with these tags.
+    :type tag_ids: List[int] | None
+    :param match_all: Require all of ``tag_ids`` rather than any of them.
+    :type match_all: bool
     :return: A list of notes.
     :rtype: List[Note]
     """
-    return (
-        db.query(Note).filter(Note.user_id == user.id).offset(skip).limit(limit).all()
-    )
+    stmt = select(Note).options(selectinload(Note.tags)).where(Note.user_id == user.id)
+    if tag_ids:
+        stmt = stmt.where(_tagged(tag_ids, match_all))
+    stmt = stmt.order_by(Note.created_at, Note.id).offset(skip).limit(limit)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def get_notes_after(
+    after: tuple[datetime, int] | None,
+    limit: int,
+    user: User,
+    db: AsyncSession,
+    tag_ids: List[int] | None = None,
+    match_all: bool = False,
+) -> List[Note]:
+    """
+    Retrieves a page of notes for a specific user, ordered by creation time and ID,
+    that come after the given sort key. The cost of a page does not depend on its depth.
+
+    :param after: The ``(created_at, id)`` of the last note of the previous page, or None for the first page.
+    :type after: tuple[datetime, int] | None
+    :param limit: The maximum number of notes to return.
+    :type limit: int
+    :param user: The user to retrieve notes for.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :param tag_ids: Only return notes tagged with these tags.
+    :type tag_ids: List[int] | None
+    :param match_all: Require all of ``tag_ids`` rather than any of them.
+    :type match_all: bool
+    :return: A list of notes.
+    :rtype: List[Note]
+    """
+    stmt = select(Note).options(selectinload(Note.tags)).where(Note.user_id == user.id)
+    if tag_ids:
+        stmt = stmt.where(_tagged(tag_ids, match_all))
+    if after is not None:
+        stmt = stmt.where(tuple_(Note.created_at, Note.id) > after)
+    stmt = stmt.order_by(Note.created_at, Note.id).limit(limit)
+    result = await db.execute(stmt)
+    return result.scalars().all()
 
 
-async def get_note(note_id: int, user: User, db: Session) -> Note:
+async def get_note(note_id: int, user: User, db: AsyncSession) -> Note:
     """
     Retrieves a single note with the specified ID for a specific user.
 
@@ -36,16 +148,91 @@ async def get_note(note_id: int, user: User, db: Session) -> Note:
     :param user: The user to retrieve the note for.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: The note with the specified ID, or None if it does not exist.
     :rtype: Note | None
     """
-    return (
-        db.query(Note).filter(and_(Note.id == note_id, Note.user_id == user.id)).first()
+    return await _get_user_note(note_id, user, db)
+
+
+async def search_notes(
+    query: str, skip: int, limit: int, user: User, db: AsyncSession
+) -> List[Note]:
+    """
+    Full-text searches the title and description of a user's notes, best matches first.
+    Uses the GIN-indexed ``search_vector`` column on PostgreSQL and the ``notes_fts``
+    FTS5 table on SQLite. Every word of the query must match.
+
+    :param query: The words to search for.
+    :type query: str
+    :param skip: The number of notes to skip.
+    :type skip: int
+    :param limit: The maximum number of notes to return.
+    :type limit: int
+    :param user: The user to search notes for.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: A list of matching notes.
+    :rtype: List[Note]
+    """
+    stmt = select(Note).options(selectinload(Note.tags)).where(Note.user_id == user.id)
+    if db.bind.dialect.name == "sqlite":
+        fts = literal_column("notes_fts")
+        # Quote every word so that FTS5 query syntax in user input is taken literally
+        match = " ".join('"' + word.replace('"', '""') + '"' for word in query.split())
+        stmt = (
+            stmt.join(notes_fts, notes_fts.c.rowid == Note.id)
+            .where(fts.op("MATCH")(match))
+            .order_by(func.bm25(fts), Note.id)
+        )
+    else:
+        search_vector = literal_column("notes.search_vector")
+        tsquery = func.plainto_tsquery("simple", query)
+        stmt = stmt.where(search_vector.op("@@")(tsquery)).order_by(
+            func.ts_rank_cd(search_vector, tsquery).desc(), Note.id
+        )
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+async def stream_notes(
+    user: User, db: AsyncSession, batch_size: int
+) -> AsyncIterator[List[dict]]:
+    """
+    Streams every note of a specific user, with its tags, through a server-side
+    cursor. Only one batch of rows is held in memory at a time, and the tags of
+    each batch are loaded with one query.
+
+    :param user: The user to export the notes for.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :param batch_size: The number of notes fetched from the cursor at a time.
+    :type batch_size: int
+    :return: Batches of notes as plain dicts, ordered by creation time.
+    :rtype: AsyncIterator[List[dict]]
+    """
+    result = await db.stream(
+        select(Note.id, Note.title, Note.description, Note.done, Note.created_at)
+        .where(Note.user_id == user.id)
+        .order_by(Note.created_at, Note.id)
+        .execution_options(yield_per=batch_size)
     )
+    async for rows in result.partitions():
+        notes = {row.id: {**row._asdict(), "tags": []} for row in rows}
+        tags = await db.execute(
+            select(note_m2m_tag.c.note_id, Tag.id, Tag.name)
+            .join(Tag, Tag.id == note_m2m_tag.c.tag_id)
+            .where(note_m2m_tag.c.note_id.in_(list(notes)))
+            .order_by(Tag.id)
+        )
+        for note_id, tag_id, name in tags:
+            notes[note_id]["tags"].append({"id": tag_id, "name": name})
+        yield list(notes.values())
 
 
-async def create_note(body: NoteModel, user: User, db: Session) -> Note:
+async def create_note(body: NoteModel, user: User, db: AsyncSession) -> Note:
     """
     Creates a new note for a specific user.
 
@@ -54,21 +241,22 @@ async def create_note(body: NoteModel, user: User, db: Session) -> Note:
     :param user: The user to create the note for.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: The newly created note.
     :rtype: Note
     """
-    tags = (
-        db.query(Tag).filter(and_(Tag.id.in_(body.tags), Tag.user_id == user.id)).all()
+    tags = await _get_user_tags(body.tags, user, db)
+    note = Note(
+        title=body.title, description=body.description, tags=tags, user_id=user.id
     )
-    note = Note(title=body.title, description=body.description, tags=tags, user=user)
     db.add(note)
-    db.commit()
-    db.refresh(note)
+    await db.commit()
+    await collection_versions.bump(user.id, NOTES)
+    await db.refresh(note, attribute_names=["id", "created_at", "done"])
     return note
 
 
-async def remove_note(note_id: int, user: User, db: Session) -> Note | None:
+async def remove_note(note_id: int, user: User, db: AsyncSession) -> Note | None:
     """
     Removes a single note with the specified ID for a specific user.
 
@@ -77,21 +265,20 @@ async def remove_note(note_id: int, user: User, db: Session) -> Note | None:
     :param user: The user to remove the note for.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: The removed note, or None if it does not exist.
     :rtype: Note | None
     """
-    note = (
-        db.query(Note).filter(and_(Note.id == note_id, Note.user_id == user.id)).first()
-    )
+    note = await _get_user_note(note_id, user, db)
     if note:
-        db.delete(note)
-        db.commit()
+        await db.delete(note)
+        await db.commit()
+        await collection_versions.bump(user.id, NOTES)
     return note
 
 
 async def update_note(
-    note_id: int, body: NoteUpdate, user: User, db: Session
+    note_id: int, body: NoteUpdate, user: User, db: AsyncSession
 ) -> Note | None:
     """
     Updates a single note with the specified ID for a specific user.
@@ -103,29 +290,24 @@ async def update_note(
     :param user: The user to update the note for.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: The updated note, or None if it does not exist.
     :rtype: Note | None
     """
-    note = (
-        db.query(Note).filter(and_(Note.id == note_id, Note.user_id == user.id)).first()
-    )
+    note = await _get_user_note(note_id, user, db)
     if note:
-        tags = (
-            db.query(Tag)
-            .filter(and_(Tag.id.in_(body.tags), Note.user_id == user.id))
-            .all()
-        )
+        tags = await _get_user_tags(body.tags, user, db)
         note.title = body.title
         note.description = body.description
         note.done = body.done
         note.tags = tags
-        db.commit()
+        await db.commit()
+        await collection_versions.bump(user.id, NOTES)
     return note
 
 
 async def update_status_note(
-    note_id: int, body: NoteStatusUpdate, user: User, db: Session
+    note_id: int, body: NoteStatusUpdate, user: User, db: AsyncSession
 ) -> Note | None:
     """
     Updates the status (i.e. "done" or "not done") of a single note with the specified ID for a specific user.
@@ -137,14 +319,185 @@ async def update_status_note(
     :param user: The user to update the note for.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: The updated note, or None if it does not exist.
     :rtype: Note | None
     """
-    note = (
-        db.query(Note).filter(and_(Note.id == note_id, Note.user_id == user.id)).first()
-    )
+    note = await _get_user_note(note_id, user, db)
     if note:
         note.done = body.done
-        db.commit()
+        await db.commit()
+        await collection_versions.bump(user.id, NOTES)
     return note
+
+
+async def create_notes(
+    bodies: List[NoteModel], user: User, db: AsyncSession
+) -> List[Note]:
+    """
+    Creates many notes for a specific user in a single transaction.
+    Referenced tags are resolved with one query, and notes and their tag links
+    are written with multi-row INSERT statements.
+
+    :param bodies: The data for the notes to create.
+    :type bodies: List[NoteModel]
+    :param user: The user to create the notes for.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The newly created notes, in the order of ``bodies``.
+    :rtype: List[Note]
+    """
+    if not bodies:
+        return []
+    tags = {
+        tag.id: tag
+        for tag in await _get_user_tags(
+            list({tag_id for body in bodies for tag_id in body.tags}), user, db
+        )
+    }
+    result = await db.scalars(
+        insert(Note).returning(Note, sort_by_parameter_order=True),
+        [
+            {"title": body.title, "description": body.description, "user_id": user.id}
+            for body in bodies
+        ],
+    )
+    notes = result.all()
+    links = []
+    for note, body in zip(notes, bodies):
+        note_tags = [
+            tags[tag_id] for tag_id in dict.fromkeys(body.tags) if tag_id in tags
+        ]
+        set_committed_value(note, "tags", note_tags)
+        links.extend({"note_id": note.id, "tag_id": tag.id} for tag in note_tags)
+    if links:
+        await db.execute(insert(note_m2m_tag), links)
+    await db.commit()
+    await collection_versions.bump(user.id, NOTES)
+    return notes
+
+
+async def update_notes(
+    bodies: List[NoteBulkUpdate], user: User, db: AsyncSession
+) -> List[Note | None]:
+    """
+    Updates many notes of a specific user in a single transaction. Only the fields
+    present in each item are changed. Notes and referenced tags are loaded with one
+    query each, and the changes are flushed as batched statements.
+
+    :param bodies: The updates, each carrying the ID of the note to update.
+    :type bodies: List[NoteBulkUpdate]
+    :param user: The user to update the notes for.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The updated notes in the order of ``bodies``, None for notes that do not exist.
+    :rtype: List[Note | None]
+    """
+    if not bodies:
+        return []
+    result = await db.execute(
+        select(Note)
+        .options(selectinload(Note.tags))
+        .where(and_(Note.id.in_({body.id for body in bodies}), Note.user_id == user.id))
+    )
+    notes = {note.id: note for note in result.scalars()}
+    tags = {
+        tag.id: tag
+        for tag in await _get_user_tags(
+            list({tag_id for body in bodies for tag_id in body.tags or ()}), user, db
+        )
+    }
+    updated = []
+    for body in bodies:
+        note = notes.get(body.id)
+        if note is not None:
+            changes = body.dict(exclude_unset=True, exclude={"id", "tags"})
+            for field, value in changes.items():
+                setattr(note, field, value)
+            if body.tags is not None:
+                note.tags = [
+                    tags[tag_id]
+                    for tag_id in dict.fromkeys(body.tags)
+                    if tag_id in tags
+                ]
+        updated.append(note)
+    await db.commit()
+    if any(note is not None for note in updated):
+        await collection_versions.bump(user.id, NOTES)
+    return updated
+
+
+async def remove_notes(note_ids: List[int], user: User, db: AsyncSession) -> List[int]:
+    """
+    Removes many notes of a specific user in a single transaction.
+
+    :param note_ids: The IDs of the notes to remove.
+    :type note_ids: List[int]
+    :param user: The user to remove the notes for.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The IDs of the notes that were removed.
+    :rtype: List[int]
+    """
+    if not note_ids:
+        return []
+    user_notes = and_(Note.id.in_(set(note_ids)), Note.user_id == user.id)
+    await db.execute(
+        delete(note_m2m_tag).where(
+            note_m2m_tag.c.note_id.in_(select(Note.id).where(user_notes))
+        )
+    )
+    result = await db.execute(delete(Note).where(user_notes).returning(Note.id))
+    removed = list(result.scalars())
+    await db.commit()
+    if removed:
+        await collection_versions.bump(user.id, NOTES)
+    return removed
+
+
+async def import_notes(records: List[NoteImport], user: User, db: AsyncSession) -> int:
+    """
+    Imports a batch of notes for a specific user in a single transaction. Tags are
+    referenced by name and created when missing; notes and their tag links are
+    written with multi-row INSERT statements.
+
+    :param records: The notes to import.
+    :type records: List[NoteImport]
+    :param user: The user to import the notes for.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The number of imported notes.
+    :rtype: int
+    """
+    if not records:
+        return 0
+    tags = await repository_tags.get_or_create_tags(
+        [name for record in records for name in record.tags], user, db
+    )
+    result = await db.scalars(
+        insert(Note).returning(Note.id, sort_by_parameter_order=True),
+        [
+            {
+                "title": record.title,
+                "description": record.description,
+                "done": record.done,
+                "user_id": user.id,
+            }
+            for record in records
+        ],
+    )
+    links = [
+        {"note_id": note_id, "tag_id": tags[name]}
+        for note_id, record in zip(result.all(), records)
+        for name in dict.fromkeys(record.tags)
+    ]
+    if links:
+        await db.execute(insert(note_m2m_tag), links)
+    await db.commit()
+    collections = (NOTES, TAGS) if tags else (NOTES,)
+    await collection_versions.bump(user.id, *collections)
+    return len(records)
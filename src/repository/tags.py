@@ -1,13 +1,15 @@
-from typing import List
+from typing import Dict, List
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import Tag, User
 from src.schemas import TagModel
+from src.services.collection_versions import NOTES, TAGS, collection_versions
 
 
-async def get_tags(skip: int, limit: int, user: User, db: Session) -> List[Tag]:
+async def get_tags(skip: int, limit: int, user: User, db: AsyncSession) -> List[Tag]:
     """
     Retrieve all tags that belong to a specific user.
 
@@ -18,14 +20,48 @@ async def get_tags(skip: int, limit: int, user: User, db: Session) -> List[Tag]:
     :param user: The user object that owns the tags.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: A list of Tag objects.
     :rtype: List[Tag]
     """
-    return db.query(Tag).filter(Tag.user_id == user.id).offset(skip).limit(limit).all()
+    stmt = (
+        select(Tag)
+        .where(Tag.user_id == user.id)
+        .order_by(Tag.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def get_tags_after(
+    after: int | None, limit: int, user: User, db: AsyncSession
+) -> List[Tag]:
+    """
+    Retrieve a page of tags that belong to a specific user, ordered by ID,
+    that come after the given tag ID.
+
+    :param after: The ID of the last tag of the previous page, or None for the first page.
+    :type after: int | None
+    :param limit: The maximum number of records to retrieve.
+    :type limit: int
+    :param user: The user object that owns the tags.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: A list of Tag objects.
+    :rtype: List[Tag]
+    """
+    stmt = select(Tag).where(Tag.user_id == user.id)
+    if after is not None:
+        stmt = stmt.where(Tag.id > after)
+    stmt = stmt.order_by(Tag.id).limit(limit)
+    result = await db.execute(stmt)
+    return result.scalars().all()
 
 
-async def get_tag(tag_id: int, user: User, db: Session) -> Tag:
+async def get_tag(tag_id: int, user: User, db: AsyncSession) -> Tag:
     """
     Retrieve a specific tag that belongs to a user.
 
@@ -34,14 +70,55 @@ async def get_tag(tag_id: int, user: User, db: Session) -> Tag:
     :param user: The user object that owns the tag.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: The Tag object with the specified ID.
     :rtype: Tag
     """
-    return db.query(Tag).filter(and_(Tag.id == tag_id, Tag.user_id == user.id)).first()
+    stmt = select(Tag).where(and_(Tag.id == tag_id, Tag.user_id == user.id))
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
 
 
-async def create_tag(body: TagModel, user: User, db: Session) -> Tag:
+async def get_or_create_tags(
+    names: List[str], user: User, db: AsyncSession
+) -> Dict[str, int]:
+    """
+    Resolves tag names of a user to tag IDs, creating the missing tags in order
+    of first appearance within the current transaction. Concurrent creations of
+    the same name are absorbed by the unique (name, user_id) constraint. The
+    caller commits and bumps the collection versions.
+
+    :param names: The tag names.
+    :type names: List[str]
+    :param user: The user object that owns the tags.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :return: The tag IDs by name.
+    :rtype: Dict[str, int]
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    stmt = select(Tag.name, Tag.id).where(
+        and_(Tag.name.in_(names), Tag.user_id == user.id)
+    )
+    tags = dict((await db.execute(stmt)).all())
+    missing = [name for name in names if name not in tags]
+    if missing:
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        await db.execute(
+            dialect.insert(Tag).on_conflict_do_nothing(),
+            [{"name": name, "user_id": user.id} for name in missing],
+        )
+        stmt = select(Tag.name, Tag.id).where(
+            and_(Tag.name.in_(missing), Tag.user_id == user.id)
+        )
+        tags.update((await db.execute(stmt)).all())
+    return tags
+
+
+async def create_tag(body: TagModel, user: User, db: AsyncSession) -> Tag:
     """
     Create a new tag for a user.
 
@@ -50,19 +127,20 @@ async def create_tag(body: TagModel, user: User, db: Session) -> Tag:
     :param user: The user object that will own the new tag.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: The newly created Tag object.
     :rtype: Tag
     """
     tag = Tag(name=body.name, user_id=user.id)
     db.add(tag)
-    db.commit()
-    db.refresh(tag)
+    await db.commit()
+    await collection_versions.bump(user.id, TAGS)
+    await db.refresh(tag)
     return tag
 
 
 async def update_tag(
-    tag_id: int, body: TagModel, user: User, db: Session
+    tag_id: int, body: TagModel, user: User, db: AsyncSession
 ) -> Tag | None:
     """
     Update an existing tag that belongs to a user.
@@ -74,18 +152,19 @@ async def update_tag(
     :param user: The user object that owns the tag.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: The updated Tag object.
     :rtype: Tag | None
     """
-    tag = db.query(Tag).filter(and_(Tag.id == tag_id, Tag.user_id == user.id)).first()
+    tag = await get_tag(tag_id, user, db)
     if tag:
         tag.name = body.name
-        db.commit()
+        await db.commit()
+        await collection_versions.bump(user.id, TAGS, NOTES)
     return tag
 
 
-async def remove_tag(tag_id: int, user: User, db: Session) -> Tag | None:
+async def remove_tag(tag_id: int, user: User, db: AsyncSession) -> Tag | None:
     """
     Remove a tag that belongs to a user.
 
@@ -94,12 +173,13 @@ async def remove_tag(tag_id: int, user: User, db: Session) -> Tag | None:
     :param user: The user object that owns the tag.
     :type user: User
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :return: The Tag object that was removed.
     :rtype: Tag | None
     """
-    tag = db.query(Tag).filter(and_(Tag.id == tag_id, Tag.user_id == user.id)).first()
+    tag = await get_tag(tag_id, user, db)
     if tag:
-        db.delete(tag)
-        db.commit()
+        await db.delete(tag)
+        await db.commit()
+        await collection_versions.bump(user.id, TAGS, NOTES)
     return tag
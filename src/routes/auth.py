@@ -4,7 +4,6 @@ from fastapi import (
     Depends,
     status,
     Security,
-    BackgroundTasks,
     Request,
 )
 from fastapi.security import (
@@ -12,13 +11,17 @@ from fastapi.security import (
     HTTPAuthorizationCredentials,
     HTTPBearer,
 )
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
+from src.database.models import User
 from src.schemas import UserModel, UserResponse, TokenModel, RequestEmail
+from src.repository import emails as repository_emails
 from src.repository import users as repository_users
 from src.services.auth import auth_service
-from src.services.email import send_email
+from src.services.email import email_worker
+from src.services.refresh_tokens import refresh_tokens
+from src.services.revocations import revocations
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 security = HTTPBearer()
@@ -29,20 +32,22 @@ security = HTTPBearer()
 )
 async def signup(
     body: UserModel,
-    background_tasks: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    exist_user = await repository_users.get_user_by_email(body.email, db)
-    if exist_user:
+    # No lookup first: the insert below is the only round-trip, and a duplicate
+    # signup, which is rare, costs the hash before it gets its 409
+    body.password = await auth_service.get_password_hash(body.password)
+    # committed together with the user, discarded if the account exists
+    repository_emails.add_confirmation_email(
+        body.email, body.username, str(request.base_url), db
+    )
+    new_user = await repository_users.create_user(body, db)
+    if new_user is None:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Account already exists"
         )
-    body.password = auth_service.get_password_hash(body.password)
-    new_user = await repository_users.create_user(body, db)
-    background_tasks.add_task(
-        send_email, new_user.email, new_user.username, request.base_url
-    )
+    email_worker.notify()
     return {
         "user": new_user,
         "detail": "User successfully created. Check your email for confirmation.",
@@ -51,7 +56,7 @@ async def signup(
 
 @router.post("/login", response_model=TokenModel)
 async def login(
-    body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
 ):
     user = await repository_users.get_user_by_email(body.username, db)
     if user is None:
@@ -62,14 +67,15 @@ async def login(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed"
         )
-    if not auth_service.verify_password(body.password, user.password):
+    if not await auth_service.verify_password(body.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password"
         )
     # Generate JWT
-    access_token = await auth_service.create_access_token(data={"sub": user.email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
-    await repository_users.update_token(user, refresh_token, db)
+    family, refresh_token = await refresh_tokens.issue(user.email)
+    access_token = await auth_service.create_access_token(
+        data={"sub": user.email, "fid": family}
+    )
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -80,20 +86,11 @@ async def login(
 @router.get("/refresh_token", response_model=TokenModel)
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Security(security),
-    db: Session = Depends(get_db),
 ):
-    token = credentials.credentials
-    email = await auth_service.decode_refresh_token(token)
-    user = await repository_users.get_user_by_email(email, db)
-    if user.refresh_token != token:
-        await repository_users.update_token(user, None, db)
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
-        )
-
-    access_token = await auth_service.create_access_token(data={"sub": email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": email})
-    await repository_users.update_token(user, refresh_token, db)
+    email, family, refresh_token = await refresh_tokens.rotate(credentials.credentials)
+    access_token = await auth_service.create_access_token(
+        data={"sub": email, "fid": family}
+    )
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -101,8 +98,21 @@ async def refresh_token(
     }
 
 
+@router.post("/logout")
+async def logout(
+    token: str = Depends(auth_service.oauth2_scheme),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    claims = await auth_service.decode_access_token(token)
+    if "jti" in claims:
+        await revocations.revoke(claims["jti"], claims["exp"])
+    if "fid" in claims:
+        await refresh_tokens.revoke(claims["fid"])
+    return {"message": "Successfully logged out"}
+
+
 @router.get("/confirmed_email/{token}")
-async def confirmed_email(token: str, db: Session = Depends(get_db)):
+async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
     email = await auth_service.get_email_from_token(token)
     user = await repository_users.get_user_by_email(email, db)
     if user is None:
@@ -118,16 +128,16 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
 @router.post("/request_email")
 async def request_email(
     body: RequestEmail,
-    background_tasks: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     user = await repository_users.get_user_by_email(body.email, db)
 
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_tasks.add_task(
-            send_email, user.email, user.username, request.base_url
+        await repository_emails.queue_confirmation_email(
+            user.email, user.username, str(request.base_url), db
         )
+        email_worker.notify()
     return {"message": "Check your email for confirmation."}
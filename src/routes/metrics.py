@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.database.db import pool_stats, replica_engines
+from src.services.email import email_worker
+from src.services.metrics import render
+from src.services.rate_limit import rate_limiter
+from src.services.refresh_tokens import refresh_tokens
+from src.services.revocations import revocations
+from src.services.response_cache import response_cache
+from src.services.token_cache import token_cache
+from src.services.user_cache import user_cache
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    description="Connection pool and cache statistics of this worker "
+    "in the Prometheus text format.",
+)
+async def read_metrics():
+    groups = {"db_pool": pool_stats()}
+    for index, replica in enumerate(replica_engines):
+        groups[f"db_replica_{index}_pool"] = pool_stats(replica.pool)
+    groups["user_cache"] = user_cache.stats()
+    groups["token_cache"] = token_cache.stats()
+    groups["response_cache"] = response_cache.stats()
+    groups["email_worker"] = email_worker.stats()
+    groups["rate_limit"] = rate_limiter.stats()
+    groups["refresh_tokens"] = refresh_tokens.stats()
+    groups["revocations"] = revocations.stats()
+    return render(groups)
@@ -1,38 +1,249 @@
+from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
-from fastapi_limiter.depends import RateLimiter
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Depends,
+    status,
+    Body,
+    Query,
+    Request,
+    Response,
+)
+from pydantic import conlist
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
-from src.database.db import get_db
+from src.conf.config import settings
+from src.database.db import get_db, get_read_db
 from src.database.models import User
-from src.schemas import NoteModel, NoteUpdate, NoteStatusUpdate, NoteResponse
+from src.schemas import (
+    NoteModel,
+    NoteUpdate,
+    NoteStatusUpdate,
+    NoteResponse,
+    NotePage,
+    NoteBulkUpdate,
+    NoteBulkResult,
+    NoteImportResult,
+)
 from src.repository import notes as repository_notes
 from src.services.auth import auth_service
+from src.services.collection_versions import NOTES, collection_versions
+from src.services import imports
+from src.services.ndjson import encode_batches, gzip_chunks
+from src.services.pagination import encode_cursor, decode_cursor
+from src.services.rate_limit import RateLimit
+from src.services.response_cache import response_cache
+from src.services.serialization import (
+    dump_notes,
+    dump_page,
+    json_response,
+    note_to_dict,
+)
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
+BULK_MAX_ITEMS = settings.notes_bulk_max_items
+EXPORT_BATCH_SIZE = settings.notes_export_batch_size
+IMPORT_BATCH_SIZE = settings.notes_import_batch_size
+IMPORT_MAX_ERRORS = settings.notes_import_max_errors
+
+
+def parse_tag_ids(
+    tags: str | None = Query(None, regex=r"^\d+(,\d+)*$", description="e.g. 1,2")
+) -> List[int] | None:
+    return [int(tag_id) for tag_id in tags.split(",")] if tags else None
+
 
 @router.get(
     "/",
-    response_model=List[NoteResponse],
-    description="No more than 10 requests per minute",
-    dependencies=[Depends(RateLimiter(times=10, seconds=60))],
+    response_model=List[NoteResponse] | NotePage,
+    response_class=ORJSONResponse,
+    description="Rate limited per user, to 10 requests per minute by default. "
+    "Pass `after` (empty for the first page) to page by cursor: "
+    "the response is then a page with `items` and `next_cursor`. "
+    "Pass `tags` to only list notes with `any` or `all` of those tags. "
+    "Send the returned `ETag` in `If-None-Match` to get 304 while unchanged.",
+    dependencies=[Depends(RateLimit("notes:read"))],
 )
 async def read_notes(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: str | None = None,
+    tag_ids: List[int] | None = Depends(parse_tag_ids),
+    match: str = Query("any", regex="^(any|all)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    # Listed from the primary: the version is bumped right after the primary
+    # commits, so rows read from a lagging replica would be served, and cached,
+    # under the new version.
+    not_modified = await collection_versions.not_modified(
+        NOTES, current_user.id, request, response
+    )
+    if not_modified is not None:
+        return not_modified
+    cache_key = response_cache.key(NOTES, request, response)
+    if cache_key is not None:
+        body = await response_cache.get(cache_key)
+        if body is not None:
+            return json_response(body, response)
+    match_all = match == "all"
+    if after is None:
+        notes = await repository_notes.get_notes(
+            skip, limit, current_user, db, tag_ids, match_all
+        )
+        body = dump_notes(notes)
+    else:
+        key = None
+        if after:
+            try:
+                created_at, note_id = decode_cursor(after, 2)
+                key = (datetime.fromisoformat(created_at), int(note_id))
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+                )
+        notes = await repository_notes.get_notes_after(
+            key, limit + 1, current_user, db, tag_ids, match_all
+        )
+        next_cursor = None
+        if limit > 0 and len(notes) > limit:
+            notes = notes[:limit]
+            next_cursor = encode_cursor(notes[-1].created_at, notes[-1].id)
+        body = dump_page([note_to_dict(note) for note in notes], next_cursor)
+    if cache_key is not None:
+        await response_cache.set(cache_key, body)
+    return json_response(body, response)
+
+
+@router.get("/search", response_model=List[NoteResponse], response_class=ORJSONResponse)
+async def search_notes(
+    response: Response,
+    q: str = Query(min_length=1, max_length=200),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    notes = []
+    if q.split():
+        notes = await repository_notes.search_notes(q, skip, limit, current_user, db)
+    return json_response(dump_notes(notes), response)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    description="Streams every note of the user, with its tags, as NDJSON. "
+    "Pass `gzip=true` to download it gzip-compressed.",
+)
+async def export_notes(
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    chunks = encode_batches(
+        repository_notes.stream_notes(current_user, db, EXPORT_BATCH_SIZE)
+    )
+    filename = "notes.ndjson"
+    media_type = "application/x-ndjson"
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post(
+    "/import",
+    response_model=NoteImportResult,
+    description="Imports notes from a streamed NDJSON body, one note per line, "
+    "or from a `text/csv` body with a `title,description,done,tags` header and "
+    "tag names separated by `;`. Tags are referenced by name and created when "
+    "missing. Notes are written in batches; invalid lines are skipped and reported.",
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def import_notes(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    is_csv = request.headers.get("content-type", "").startswith("text/csv")
+    return await imports.import_notes(
+        request.stream(),
+        is_csv,
+        current_user,
+        db,
+        IMPORT_BATCH_SIZE,
+        IMPORT_MAX_ERRORS,
+    )
+
+
+@router.post(
+    "/bulk",
+    response_model=List[NoteBulkResult],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_notes(
+    body: conlist(NoteModel, max_items=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    notes = await repository_notes.create_notes(body, current_user, db)
+    return [{"id": note.id, "status": "created", "note": note} for note in notes]
+
+
+@router.patch("/bulk", response_model=List[NoteBulkResult])
+async def update_notes(
+    body: conlist(NoteBulkUpdate, max_items=BULK_MAX_ITEMS),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(auth_service.get_current_user),
+):
+    notes = await repository_notes.update_notes(body, current_user, db)
+    return [
+        (
+            {"id": item.id, "status": "updated", "note": note}
+            if note is not None
+            else {"id": item.id, "status": "not_found"}
+        )
+        for item, note in zip(body, notes)
+    ]
+
+
+@router.delete("/bulk", response_model=List[NoteBulkResult])
+async def remove_notes(
+    body: conlist(int, max_items=BULK_MAX_ITEMS) = Body(),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
-    notes = await repository_notes.get_notes(skip, limit, current_user, db)
-    return notes
+    removed = set(await repository_notes.remove_notes(body, current_user, db))
+    return [
+        {"id": note_id, "status": "deleted" if note_id in removed else "not_found"}
+        for note_id in body
+    ]
 
 
 @router.get("/{note_id}", response_model=NoteResponse)
 async def read_note(
     note_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     note = await repository_notes.get_note(note_id, current_user, db)
@@ -46,7 +257,7 @@ async def read_note(
 @router.post("/", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 async def create_note(
     body: NoteModel,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     return await repository_notes.create_note(body, current_user, db)
@@ -56,7 +267,7 @@ async def create_note(
 async def update_note(
     body: NoteUpdate,
     note_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     note = await repository_notes.update_note(note_id, body, current_user, db)
@@ -71,7 +282,7 @@ async def update_note(
 async def update_status_note(
     body: NoteStatusUpdate,
     note_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     note = await repository_notes.update_status_note(note_id, body, current_user, db)
@@ -85,7 +296,7 @@ async def update_status_note(
 @router.delete("/{note_id}", response_model=NoteResponse)
 async def remove_note(
     note_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     note = await repository_notes.remove_note(note_id, current_user, db)
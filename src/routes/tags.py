@@ -1,32 +1,80 @@
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
+from src.database.db import get_db, get_read_db
 from src.database.models import User
-from src.schemas import TagModel, TagResponse
+from src.schemas import TagModel, TagResponse, TagPage
 from src.repository import tags as repository_tags
 from src.services.auth import auth_service
+from src.services.collection_versions import TAGS, collection_versions
+from src.services.pagination import encode_cursor, decode_cursor
+from src.services.response_cache import response_cache
+from src.services.serialization import dump_page, dump_tags, json_response, tag_to_dict
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
 
-@router.get("/", response_model=List[TagResponse])
+@router.get(
+    "/",
+    response_model=List[TagResponse] | TagPage,
+    response_class=ORJSONResponse,
+    description="Pass `after` (empty for the first page) to page by cursor: "
+    "the response is then a page with `items` and `next_cursor`. "
+    "Send the returned `ETag` in `If-None-Match` to get 304 while unchanged.",
+)
 async def read_tags(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    after: str | None = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
-    tags = await repository_tags.get_tags(skip, limit, current_user, db)
-    return tags
+    # Listed from the primary: the version is bumped right after the primary
+    # commits, so rows read from a lagging replica would be served, and cached,
+    # under the new version.
+    not_modified = await collection_versions.not_modified(
+        TAGS, current_user.id, request, response
+    )
+    if not_modified is not None:
+        return not_modified
+    cache_key = response_cache.key(TAGS, request, response)
+    if cache_key is not None:
+        body = await response_cache.get(cache_key)
+        if body is not None:
+            return json_response(body, response)
+    if after is None:
+        tags = await repository_tags.get_tags(skip, limit, current_user, db)
+        body = dump_tags(tags)
+    else:
+        key = None
+        if after:
+            try:
+                (key,) = decode_cursor(after, 1)
+                key = int(key)
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+                )
+        tags = await repository_tags.get_tags_after(key, limit + 1, current_user, db)
+        next_cursor = None
+        if limit > 0 and len(tags) > limit:
+            tags = tags[:limit]
+            next_cursor = encode_cursor(tags[-1].id)
+        body = dump_page([tag_to_dict(tag) for tag in tags], next_cursor)
+    if cache_key is not None:
+        await response_cache.set(cache_key, body)
+    return json_response(body, response)
 
 
 @router.get("/{tag_id}", response_model=TagResponse)
 async def read_tag(
     tag_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     tag = await repository_tags.get_tag(tag_id, current_user, db)
@@ -40,7 +88,7 @@ async def read_tag(
 @router.post("/", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
 async def create_tag(
     body: TagModel,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     return await repository_tags.create_tag(body, current_user, db)
@@ -50,7 +98,7 @@ async def create_tag(
 async def update_tag(
     body: TagModel,
     tag_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     tag = await repository_tags.update_tag(tag_id, body, current_user, db)
@@ -64,7 +112,7 @@ async def update_tag(
 @router.delete("/{tag_id}", response_model=TagResponse)
 async def remove_tag(
     tag_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(auth_service.get_current_user),
 ):
     tag = await repository_tags.remove_tag(tag_id, current_user, db)
@@ -1,14 +1,12 @@
 from fastapi import APIRouter, Depends, status, UploadFile, File
-from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import users as repository_users
 from src.services.auth import auth_service
-from src.conf.config import settings
 from src.schemas import UserDb
+from src.services.storage import avatar_storage
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -22,20 +20,13 @@ async def read_users_me(current_user: User = Depends(auth_service.get_current_us
 async def update_avatar_user(
     file: UploadFile = File(),
     current_user: User = Depends(auth_service.get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True,
-    )
-
-    cloudinary.uploader.upload(
-        file.file, public_id=f"NotesApp/{current_user.username}", overwrite=True
-    )
-    src_url = cloudinary.CloudinaryImage(f"NotesApp/{current_user.username}").build_url(
-        width=250, height=250, crop="fill"
-    )
+    data, digest = await avatar_storage.read(file)
+    key = avatar_storage.key(current_user.id, digest)
+    if current_user.avatar == avatar_storage.url(key):
+        # Same image as the current avatar: nothing to resize, upload or write
+        return current_user
+    src_url = await avatar_storage.store(key, data)
     user = await repository_users.update_avatar(current_user.email, src_url, db)
     return user
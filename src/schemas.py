@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, constr, validator
 
 
 class TagModel(BaseModel):
@@ -14,6 +14,11 @@ class TagResponse(TagModel):
         orm_mode = True
 
 
+class TagPage(BaseModel):
+    items: List[TagResponse]
+    next_cursor: Optional[str] = None
+
+
 class NoteBase(BaseModel):
     title: str = Field(max_length=50)
     description: str = Field(max_length=150)
@@ -41,6 +46,62 @@ class NoteResponse(NoteBase):
         orm_mode = True
 
 
+class NoteBulkUpdate(BaseModel):
+    id: int
+    title: Optional[str] = Field(None, max_length=50)
+    description: Optional[str] = Field(None, max_length=150)
+    done: Optional[bool] = None
+    tags: Optional[List[int]] = None
+
+    @validator("title", "description", "done")
+    def not_null(cls, value):
+        # omit a field to leave it unchanged; null is not a value of these columns
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+
+class NoteBulkResult(BaseModel):
+    id: int
+    status: str
+    note: Optional[NoteResponse] = None
+
+
+def _tag_name(tag: dict) -> str:
+    name = tag.get("name")
+    if not isinstance(name, str):
+        raise ValueError("tag objects need a string name")
+    return name
+
+
+class NoteImport(NoteBase):
+    done: bool = False
+    tags: List[constr(min_length=1, max_length=25)] = []
+
+    @validator("tags", pre=True)
+    def tag_names(cls, value):
+        # accept the {"id": ..., "name": ...} objects of GET /api/notes/export
+        if isinstance(value, list):
+            return [_tag_name(tag) if isinstance(tag, dict) else tag for tag in value]
+        return value
+
+
+class NoteImportError(BaseModel):
+    line: int
+    error: str
+
+
+class NoteImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[NoteImportError]
+
+
+class NotePage(BaseModel):
+    items: List[NoteResponse]
+    next_cursor: Optional[str] = None
+
+
 class UserModel(BaseModel):
     username: str = Field(min_length=5, max_length=16)
     email: str
@@ -1,34 +1,47 @@
-import pickle
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from datetime import datetime, timedelta
 
-from redis import Redis
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.database.cache import redis_client
 from src.database.db import get_db
 from src.repository import users as repository_users
+from src.services.revocations import revocations
+from src.services.token_cache import token_cache
+from src.services.user_cache import (
+    CachedUser,
+    decode_user,
+    encode_user,
+    user_cache,
+)
 from src.conf.config import settings
 
 
 class Auth:
     pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    # bcrypt releases the GIL, so hashing scales with the number of workers
+    pwd_executor = ThreadPoolExecutor(
+        max_workers=settings.password_hash_workers, thread_name_prefix="bcrypt"
+    )
     SECRET_KEY = settings.secret_key
     ALGORITHM = settings.algorithm
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-    r = Redis(
-        host=settings.redis_host,
-        port=settings.redis_port,
-        password=settings.redis_password,
-        db=0,
-    )
+    r = redis_client
+    cache = user_cache
+    token_cache = token_cache
+    revocations = revocations
 
-    def verify_password(self, plain_password, hashed_password) -> bool:
+    async def verify_password(self, plain_password, hashed_password) -> bool:
         """
         Compares a plain password with a hashed password to check if they match.
+        The comparison runs on the password hashing pool, off the event loop.
 
         :param plain_password: The plain text password.
         :type plain_password: str
@@ -37,18 +50,25 @@ class Auth:
         :return: True if the passwords match, False otherwise.
         :rtype: bool
         """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pwd_executor, self.pwd_context.verify, plain_password, hashed_password
+        )
 
-    def get_password_hash(self, password: str) -> str:
+    async def get_password_hash(self, password: str) -> str:
         """
         Generates a hash for a plain password using the bcrypt algorithm.
+        Hashing runs on the password hashing pool, off the event loop.
 
         :param password: The plain text password.
         :type password: str
         :return: The hashed password.
         :rtype: str
         """
-        return self.pwd_context.hash(password)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pwd_executor, self.pwd_context.hash, password
+        )
 
     # define a function to generate a new access token
     async def create_access_token(
@@ -70,7 +90,12 @@ class Auth:
         else:
             expire = datetime.utcnow() + timedelta(minutes=150)
         to_encode.update(
-            {"iat": datetime.utcnow(), "exp": expire, "scope": "access_token"}
+            {
+                "iat": datetime.utcnow(),
+                "exp": expire,
+                "scope": "access_token",
+                "jti": uuid.uuid4().hex,
+            }
         )
         encoded_access_token = jwt.encode(
             to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM
@@ -104,14 +129,14 @@ class Auth:
         )
         return encoded_refresh_token
 
-    async def decode_refresh_token(self, refresh_token: str) -> str:
+    async def decode_refresh_token(self, refresh_token: str) -> dict:
         """
         Decodes the provided JWT refresh token.
 
         :param refresh_token: The refresh token to decode.
         :type refresh_token: str
-        :return: The email associated with the decoded refresh token.
-        :rtype: str
+        :return: The claims of the decoded refresh token.
+        :rtype: dict
         :raises HTTPException: If the token is invalid or the scope is incorrect.
         """
         try:
@@ -119,8 +144,7 @@ class Auth:
                 refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM]
             )
             if payload["scope"] == "refresh_token":
-                email = payload["sub"]
-                return email
+                return payload
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid scope for token",
@@ -131,8 +155,39 @@ class Auth:
                 detail="Could not validate credentials",
             )
 
+    async def decode_access_token(self, token: str) -> dict:
+        """
+        Decodes a JWT access token, unless this exact token was verified before
+        and has not expired.
+
+        :param token: The access token to decode.
+        :type token: str
+        :return: The claims of the token.
+        :rtype: dict
+        :raises HTTPException: If the token is invalid or the scope is incorrect.
+        """
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        payload = self.token_cache.get(token)
+        if payload is None:
+            try:
+                payload = jwt.decode(
+                    token, self.SECRET_KEY, algorithms=[self.ALGORITHM]
+                )
+            except JWTError as e:
+                raise credentials_exception
+            self.token_cache.set(token, payload)
+        if payload.get("scope") != "access_token":
+            raise credentials_exception
+        return payload
+
     async def get_current_user(
-        self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+        self,
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_db),
     ):
         """
         Returns the current user associated with the provided JWT token.
@@ -140,38 +195,41 @@ class Auth:
         :param token: The JWT token for which to retrieve the user.
         :type token: str
         :param db: The database session to use.
-        :type db: sqlalchemy.orm.Session
+        :type db: sqlalchemy.ext.asyncio.AsyncSession
         :return: The user associated with the provided token.
-        :rtype: dict
-        :raises HTTPException: If the token is invalid, the scope is incorrect, or the user cannot be found.
+        :rtype: CachedUser
+        :raises HTTPException: If the token is invalid, the scope is incorrect, the token was revoked, or the user cannot be found.
         """
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-
-        try:
-            # Decode JWT
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload["scope"] == "access_token":
-                email = payload["sub"]
-                if email is None:
-                    raise credentials_exception
-            else:
-                raise credentials_exception
-        except JWTError as e:
+        payload = await self.decode_access_token(token)
+        email = payload.get("sub")
+        if email is None:
+            raise credentials_exception
+        # Costs a Redis round-trip only if the token ID hits the revocation filter
+        jti = payload.get("jti")
+        if jti is not None and await self.revocations.is_revoked(jti):
             raise credentials_exception
 
-        user = self.r.get(f"user:{email}")
+        user = self.cache.get(email)
+        if user is not None:
+            return user
+        data = await self.r.get(f"user:{email}")
+        user = decode_user(data) if data is not None else None
         if user is None:
-            user = await repository_users.get_user_by_email(email, db)
-            if user is None:
+            # Read from the primary: a lagging replica would put a stale user
+            # back into the caches right after a write invalidated it. The
+            # session connects on this first query, so cache hits never take a
+            # database connection.
+            db_user = await repository_users.get_user_by_email(email, db)
+            if db_user is None:
                 raise credentials_exception
-            self.r.set(f"user:{email}", pickle.dumps(user))
-            self.r.expire(f"user:{email}", 900)
-        else:
-            user = pickle.loads(user)
+            user = CachedUser.from_user(db_user)
+            await self.r.set(f"user:{email}", encode_user(user), ex=900)
+        self.cache.set(email, user)
         return user
 
     def create_email_token(self, data: dict) -> str:
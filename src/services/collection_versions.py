@@ -0,0 +1,134 @@
+import time
+
+from fastapi import Request, Response, status
+from redis.exceptions import RedisError
+
+from src.database.cache import redis_client
+
+NOTES = "notes"
+TAGS = "tags"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Weak comparison of an ``If-None-Match`` header against an entity tag.
+
+    :param if_none_match: The value of the request header.
+    :type if_none_match: str | None
+    :param etag: The current entity tag.
+    :type etag: str
+    :return: True if the client already holds the current representation.
+    :rtype: bool
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+class CollectionVersions:
+    """
+    Per-user version counters of the notes and tags collections.
+
+    The counters live in Redis so that every worker sees the same value. The
+    repository bumps them after each committed write and the list routes expose
+    them as weak ETags. Missing counters are seeded from the clock, so a counter
+    lost to eviction or a flush never repeats a version a client may still hold.
+    """
+
+    def __init__(self, r=redis_client):
+        self.r = r
+
+    @staticmethod
+    def _key(collection: str, user_id: int) -> str:
+        return f"version:{collection}:{user_id}"
+
+    async def get(self, collection: str, user_id: int) -> int | None:
+        """
+        Returns the current version of a user's collection.
+
+        :param collection: The collection name, ``NOTES`` or ``TAGS``.
+        :type collection: str
+        :param user_id: The ID of the user owning the collection.
+        :type user_id: int
+        :return: The version, or None if Redis is unavailable.
+        :rtype: int | None
+        """
+        key = self._key(collection, user_id)
+        try:
+            version = await self.r.get(key)
+            if version is None:
+                await self.r.set(key, time.time_ns(), nx=True)
+                version = await self.r.get(key)
+        except (RedisError, OSError) as e:
+            print(e)
+            return None
+        return int(version) if version is not None else None
+
+    async def bump(self, user_id: int, *collections: str) -> None:
+        """
+        Moves the given collections of a user to a new version. Must be called
+        after the write has been committed.
+
+        :param user_id: The ID of the user owning the collections.
+        :type user_id: int
+        :param collections: The collection names.
+        :type collections: str
+        """
+        for collection in collections:
+            key = self._key(collection, user_id)
+            try:
+                if await self.r.incr(key) == 1:
+                    await self.r.set(key, time.time_ns())
+            except (RedisError, OSError) as e:
+                print(e)
+
+    async def etag(self, collection: str, user_id: int) -> str | None:
+        """
+        Returns the weak ETag of the current version of a user's collection.
+
+        :param collection: The collection name.
+        :type collection: str
+        :param user_id: The ID of the user owning the collection.
+        :type user_id: int
+        :return: The ETag, or None if Redis is unavailable.
+        :rtype: str | None
+        """
+        version = await self.get(collection, user_id)
+        if version is None:
+            return None
+        return f'W/"{user_id}-{version}"'
+
+    async def not_modified(
+        self, collection: str, user_id: int, request: Request, response: Response
+    ) -> Response | None:
+        """
+        Conditional GET for a collection. Sets the ETag of the response and
+        returns a 304 response if the client's copy is still current.
+
+        :param collection: The collection name.
+        :type collection: str
+        :param user_id: The ID of the user owning the collection.
+        :type user_id: int
+        :param request: The incoming request.
+        :type request: Request
+        :param response: The response of the route.
+        :type response: Response
+        :return: The 304 response, or None if the route has to answer.
+        :rtype: Response | None
+        """
+        etag = await self.etag(collection, user_id)
+        if etag is None:
+            return None
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return None
+
+
+collection_versions = CollectionVersions()
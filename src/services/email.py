@@ -1,51 +1,236 @@
+import asyncio
+from datetime import timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
-from pydantic import EmailStr
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 
-from src.services.auth import auth_service
 from src.conf.config import settings
+from src.database.db import SessionLocal
+from src.repository import emails as repository_emails
+from src.services.auth import auth_service
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=EmailStr(settings.mail_from),
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME="Desired Name",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
+# Compiled once per process instead of once per message
+templates = Environment(
+    loader=FileSystemLoader(Path(__file__).parent / "templates"),
+    autoescape=select_autoescape(),
 )
+confirmation_template = templates.get_template("email_template.html")
 
 
-async def send_email(email: EmailStr, username: str, host: str):
+def build_confirmation_email(email: str, username: str, host: str) -> EmailMessage:
     """
-    Sends an email to the given email address with a confirmation link.
+    Builds the message asking a user to confirm their email address.
 
     :param email: The email address of the recipient.
-    :type email: EmailStr
+    :type email: str
     :param username: The username to include in the email.
     :type username: str
-    :param host: The hostname of the server hosting the application.
+    :param host: The base URL of the application, for the confirmation link.
     :type host: str
-    :return: None
-    :raises ConnectionErrors: If there was an error connecting to the mail server.
+    :return: The message.
+    :rtype: EmailMessage
+    """
+    token_verification = auth_service.create_email_token({"sub": email})
+    message = EmailMessage()
+    message["Subject"] = "Confirm your email"
+    message["From"] = formataddr(("Desired Name", settings.mail_from))
+    message["To"] = email
+    message.set_content(
+        confirmation_template.render(
+            host=host, username=username, token=token_verification
+        ),
+        subtype="html",
+    )
+    return message
+
+
+class SMTPSender:
+    """
+    Sends messages over one SMTP connection that is kept open between messages
+    and batches, and reopened when the server has dropped it.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = True,
+        timeout: float = 30,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._smtp: aiosmtplib.SMTP | None = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = aiosmtplib.SMTP(
+                hostname=self.hostname,
+                port=self.port,
+                use_tls=self.use_tls,
+                timeout=self.timeout,
+            )
+            await self._smtp.connect()
+            if self.username:
+                await self._smtp.login(self.username, self.password)
+        return self._smtp
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Sends a message, reconnecting once if the connection was dropped.
+
+        :param message: The message to send.
+        :type message: EmailMessage
+        :raises aiosmtplib.SMTPException: If the message could not be sent.
+        """
+        smtp = await self._connect()
+        try:
+            await smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            smtp = await self._connect()
+            await smtp.send_message(message)
+
+    async def close(self) -> None:
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException as e:
+                print(e)
+        self._smtp = None
+
+
+class EmailWorker:
     """
-    try:
-        token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        print('SEND EMAIL')
-        await fm.send_message(message, template_name="email_template.html")
-    except ConnectionErrors as err:
-        print(err)
+    Background task delivering the emails of the outbox table in batches.
+
+    Every batch is claimed in one transaction (``FOR UPDATE SKIP LOCKED`` on
+    PostgreSQL, so several workers can run side by side) and sent over the
+    persistent connection of the sender. The claim leases the batch for as long
+    as sending it can take with every message hitting the sender's timeout, and
+    each email is marked sent as soon as it is, so a crash resends at most the
+    message in flight. Failed emails are retried with an exponential backoff
+    starting at ``retry_after`` seconds, up to ``max_attempts`` attempts.
+    """
+
+    def __init__(
+        self,
+        sender: SMTPSender,
+        session_factory=SessionLocal,
+        batch_size: int = 50,
+        poll_interval: float = 5,
+        retry_after: float = 30,
+        max_attempts: int = 5,
+    ):
+        self.sender = sender
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_after = timedelta(seconds=retry_after)
+        self.lease = timedelta(seconds=batch_size * sender.timeout)
+        self.max_attempts = max_attempts
+        self.sent = 0
+        self.failed = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def notify(self) -> None:
+        """
+        Wakes the worker up when emails were added to the outbox by this process.
+        Other processes pick them up on their next poll.
+        """
+        self._wakeup.set()
+
+    async def run_once(self) -> int:
+        """
+        Claims and sends one batch of due emails.
+
+        :return: The number of emails claimed.
+        :rtype: int
+        """
+        async with self.session_factory() as db:
+            emails = await repository_emails.claim_due_emails(
+                self.batch_size, self.lease, db
+            )
+            for email in emails:
+                try:
+                    message = build_confirmation_email(
+                        email.recipient, email.username, email.host
+                    )
+                    await self.sender.send(message)
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    print(e)
+                    self.failed += 1
+                    if email.attempts >= self.max_attempts:
+                        retry_after = None
+                    else:
+                        retry_after = self.retry_after * 2 ** (email.attempts - 1)
+                    await repository_emails.mark_failed(
+                        email, str(e), retry_after, db
+                    )
+                else:
+                    await repository_emails.mark_sent(email, db)
+                    self.sent += 1
+        return len(emails)
+
+    async def run(self) -> None:
+        """
+        Sends batches until the outbox has nothing due, then waits for a
+        notification or the next poll.
+        """
+        while True:
+            self._wakeup.clear()
+            try:
+                while await self.run_once() == self.batch_size:
+                    pass
+            except Exception as e:
+                print(e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sender.close()
+
+    def stats(self) -> dict:
+        """
+        Returns the delivery counters of the worker.
+
+        :return: The worker statistics.
+        :rtype: dict
+        """
+        return {"sent": self.sent, "failed": self.failed}
+
+
+email_worker = EmailWorker(
+    SMTPSender(
+        settings.mail_server,
+        settings.mail_port,
+        settings.mail_username,
+        settings.mail_password,
+        use_tls=settings.mail_ssl_tls,
+    ),
+    batch_size=settings.email_batch_size,
+    poll_interval=settings.email_poll_interval,
+    retry_after=settings.email_retry_after,
+    max_attempts=settings.email_max_attempts,
+)
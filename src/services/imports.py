@@ -0,0 +1,128 @@
+import csv
+from typing import AsyncIterator, Tuple
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.models import User
+from src.repository import notes as repository_notes
+from src.schemas import NoteImport
+
+# separator of the tag names in the ``tags`` column of a CSV import
+CSV_TAG_SEPARATOR = ";"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Splits a stream of chunks into numbered lines without line terminators.
+
+    :param chunks: The raw chunks, e.g. ``request.stream()``.
+    :type chunks: AsyncIterator[bytes]
+    :return: Pairs of 1-based line number and line.
+    :rtype: AsyncIterator[Tuple[int, bytes]]
+    """
+    line_no = 0
+    rest = b""
+    async for chunk in chunks:
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            line_no += 1
+            yield line_no, line.rstrip(b"\r")
+    if rest:
+        yield line_no + 1, rest.rstrip(b"\r")
+
+
+async def iter_records(
+    chunks: AsyncIterator[bytes], is_csv: bool
+) -> AsyncIterator[Tuple[int, dict | None, str | None]]:
+    """
+    Decodes an NDJSON stream, or a CSV stream with a header line and one record
+    per line, into records. Blank lines are skipped.
+
+    :param chunks: The raw chunks.
+    :type chunks: AsyncIterator[bytes]
+    :param is_csv: Whether the stream is CSV rather than NDJSON.
+    :type is_csv: bool
+    :return: Triples of line number, record and error; exactly one of the last two is None.
+    :rtype: AsyncIterator[Tuple[int, dict | None, str | None]]
+    """
+    header = None
+    async for line_no, line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            if not is_csv:
+                record = orjson.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+            else:
+                (values,) = csv.reader([line.decode()])
+                if header is None:
+                    header = values
+                    continue
+                if len(values) != len(header):
+                    raise ValueError(f"expected {len(header)} fields")
+                record = {
+                    field: value for field, value in zip(header, values) if value != ""
+                }
+                if "tags" in record:
+                    record["tags"] = record["tags"].split(CSV_TAG_SEPARATOR)
+        except (ValueError, csv.Error) as e:
+            yield line_no, None, str(e)
+            continue
+        yield line_no, record, None
+
+
+async def import_notes(
+    chunks: AsyncIterator[bytes],
+    is_csv: bool,
+    user: User,
+    db: AsyncSession,
+    batch_size: int,
+    max_errors: int,
+) -> dict:
+    """
+    Imports a stream of notes in batches of ``batch_size``, each committed on its
+    own, so memory use does not depend on the size of the upload. Invalid lines
+    are skipped and reported.
+
+    :param chunks: The raw chunks of the upload.
+    :type chunks: AsyncIterator[bytes]
+    :param is_csv: Whether the upload is CSV rather than NDJSON.
+    :type is_csv: bool
+    :param user: The user to import the notes for.
+    :type user: User
+    :param db: The database session.
+    :type db: AsyncSession
+    :param batch_size: The number of notes written per transaction.
+    :type batch_size: int
+    :param max_errors: The maximum number of line errors reported; more are only counted.
+    :type max_errors: int
+    :return: The number of imported and failed lines, and the first line errors.
+    :rtype: dict
+    """
+    imported = 0
+    failed = 0
+    errors = []
+    batch = []
+    async for line_no, record, error in iter_records(chunks, is_csv):
+        if error is None:
+            try:
+                batch.append(NoteImport.parse_obj(record))
+            except ValidationError as e:
+                error = "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                    for err in e.errors()
+                )
+        if error is not None:
+            failed += 1
+            if len(errors) < max_errors:
+                errors.append({"line": line_no, "error": error})
+            continue
+        if len(batch) >= batch_size:
+            imported += await repository_notes.import_notes(batch, user, db)
+            batch = []
+    imported += await repository_notes.import_notes(batch, user, db)
+    return {"imported": imported, "failed": failed, "errors": errors}
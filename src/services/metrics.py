@@ -0,0 +1,72 @@
+import bisect
+from typing import Dict, Iterable
+
+
+class Histogram:
+    """
+    In-process histogram with cumulative buckets, rendered the way Prometheus
+    histograms are.
+    """
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Records a value.
+
+        :param value: The observed value.
+        :type value: float
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def stats(self) -> dict:
+        """
+        Returns the cumulative bucket counts, sum and count of the observations.
+
+        :return: The histogram statistics.
+        :rtype: dict
+        """
+        buckets = {}
+        total = 0
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            total += count
+            buckets[bound] = total
+        return {"buckets": buckets, "sum": self.sum, "count": self.count}
+
+
+def _format(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def render(groups: Dict[str, dict]) -> str:
+    """
+    Renders groups of statistics in the Prometheus text exposition format.
+    Every value becomes a ``<group>_<name>`` sample; nested histogram statistics
+    become ``_bucket``, ``_sum`` and ``_count`` samples.
+
+    :param groups: Statistics by metric prefix, e.g. ``{"user_cache": user_cache.stats()}``.
+    :type groups: Dict[str, dict]
+    :return: The exposition text.
+    :rtype: str
+    """
+    lines = []
+    for prefix, stats in groups.items():
+        for name, value in stats.items():
+            metric = f"{prefix}_{name}"
+            if isinstance(value, dict):
+                lines.append(f"# TYPE {metric} histogram")
+                for bound, count in value["buckets"].items():
+                    lines.append(f'{metric}_bucket{{le="{_format(bound)}"}} {count}')
+                lines.append(f"{metric}_sum {_format(float(value['sum']))}")
+                lines.append(f"{metric}_count {value['count']}")
+            else:
+                lines.append(f"{metric} {_format(value)}")
+    return "\n".join(lines) + "\n"
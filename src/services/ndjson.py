@@ -0,0 +1,36 @@
+import zlib
+from typing import AsyncIterator, Iterable
+
+import orjson
+
+
+async def encode_batches(
+    batches: AsyncIterator[Iterable[dict]],
+) -> AsyncIterator[bytes]:
+    """
+    Encodes batches of records as newline-delimited JSON, one chunk per batch.
+
+    :param batches: The batches of records.
+    :type batches: AsyncIterator[Iterable[dict]]
+    :return: The encoded chunks.
+    :rtype: AsyncIterator[bytes]
+    """
+    async for batch in batches:
+        yield b"".join(orjson.dumps(record) + b"\n" for record in batch)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Compresses a stream of chunks into a single gzip member as it goes.
+
+    :param chunks: The uncompressed chunks.
+    :type chunks: AsyncIterator[bytes]
+    :return: The compressed chunks.
+    :rtype: AsyncIterator[bytes]
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
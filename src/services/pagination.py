@@ -0,0 +1,36 @@
+import base64
+
+import orjson
+
+
+def encode_cursor(*values) -> str:
+    """
+    Packs the sort key of the last row of a page into an opaque, URL-safe cursor.
+
+    :param values: The sort key values, e.g. ``created_at`` and ``id``.
+    :return: The encoded cursor.
+    :rtype: str
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(values)).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Unpacks a cursor produced by :func:`encode_cursor`.
+
+    :param cursor: The encoded cursor.
+    :type cursor: str
+    :param size: The expected number of values in the sort key.
+    :type size: int
+    :return: The sort key values.
+    :rtype: list
+    :raises ValueError: If the cursor is malformed.
+    """
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + padding))
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
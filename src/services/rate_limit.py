@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from fastapi import Depends, HTTPException, status
+from redis.exceptions import NoScriptError, RedisError
+
+from src.conf.config import settings
+from src.database.cache import redis_client
+from src.database.models import User
+from src.services.auth import auth_service
+
+# Sliding window counter over two fixed windows: the previous window counts
+# with the fraction of it still covered by the sliding window. ``served``
+# requests were already let through locally and are recorded unconditionally.
+SLIDING_WINDOW = """
+local limit = tonumber(ARGV[1])
+local weight = tonumber(ARGV[2])
+local served = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0') + served
+local previous = math.floor(tonumber(redis.call('GET', KEYS[2]) or '0') * weight)
+local allowed = 0
+if previous + current < limit then
+    current = current + 1
+    allowed = 1
+end
+if current > 0 then
+    redis.call('SET', KEYS[1], current, 'PX', ttl)
+end
+return {allowed, previous + current}
+"""
+SLIDING_WINDOW_SHA = hashlib.sha1(SLIDING_WINDOW.encode()).hexdigest()
+
+
+class Bucket:
+    __slots__ = ("tokens", "updated", "served")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.served = 0
+
+
+class RateLimiter:
+    """
+    Per-user rate limits of ``times`` requests per ``seconds``, by route name.
+
+    Every process keeps a token bucket per route and user and decides locally
+    while the bucket holds more than ``sync_below`` of its capacity. Below that,
+    each request runs one atomic sliding-window script on Redis, which records
+    the requests served locally since the last sync and answers for all
+    processes; the bucket then takes the remaining budget reported by Redis.
+    Between syncs a process can thus let through at most ``sync_below * times``
+    requests the other processes do not know about yet.
+
+    If Redis fails or does not answer within ``timeout`` seconds the decision
+    is taken locally, and Redis is left alone for ``retry_after`` seconds.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[int, float]],
+        enabled: bool = True,
+        sync_below: float = 0.5,
+        timeout: float = 0.05,
+        retry_after: float = 5,
+        maxsize: int = 10000,
+        r=redis_client,
+    ):
+        self.limits = limits
+        self.enabled = enabled
+        self.sync_below = sync_below
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.maxsize = maxsize
+        self.r = r
+        self.local = 0
+        self.synced = 0
+        self.limited = 0
+        self.redis_errors = 0
+        self._redis_down_until = 0.0
+        self._buckets: OrderedDict[Tuple[str, int], Bucket] = OrderedDict()
+
+    def _bucket(self, name: str, user_id: int, times: int, now: float) -> Bucket:
+        key = (name, user_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = Bucket(times, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    async def _eval(self, keys: list, args: list) -> list:
+        try:
+            return await self.r.evalsha(SLIDING_WINDOW_SHA, len(keys), *keys, *args)
+        except NoScriptError:
+            # EVAL also caches the script for the next EVALSHA
+            return await self.r.eval(SLIDING_WINDOW, len(keys), *keys, *args)
+
+    async def _sync(
+        self, name: str, user_id: int, times: int, seconds: float, served: int
+    ) -> Tuple[bool, int] | None:
+        """
+        Runs the sliding-window script.
+
+        :return: Whether the request is allowed and the requests counted in the
+            window, or None if Redis did not answer in time.
+        :rtype: Tuple[bool, int] | None
+        :raises RedisError: If the script failed.
+        """
+        now = time.time()
+        window = int(now // seconds)
+        weight = 1 - (now % seconds) / seconds
+        # the hash tag keeps both windows in one Redis Cluster slot
+        prefix = f"ratelimit:{{{name}:{user_id}}}"
+        keys = [f"{prefix}:{window}", f"{prefix}:{window - 1}"]
+        args = [times, weight, served, int(seconds * 2000)]
+        # Not cancelled on timeout: cancelling a command in flight can leave the
+        # pooled connection out of step. The result is dropped instead.
+        task = asyncio.ensure_future(self._eval(keys, args))
+        done, _ = await asyncio.wait({task}, timeout=self.timeout)
+        if not done:
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            return None
+        allowed, used = task.result()
+        return bool(allowed), int(used)
+
+    def _redis_failed(self, error: str) -> None:
+        print(error)
+        self.redis_errors += 1
+        self._redis_down_until = time.monotonic() + self.retry_after
+
+    async def hit(self, name: str, user_id: int) -> float:
+        """
+        Counts a request of a user to a route.
+
+        :param name: The name of the route limit.
+        :type name: str
+        :param user_id: The ID of the user.
+        :type user_id: int
+        :return: 0 if the request is allowed, otherwise the seconds to wait.
+        :rtype: float
+        """
+        if not self.enabled or name not in self.limits:
+            return 0
+        times, seconds = self.limits[name]
+        rate = times / seconds
+        now = time.monotonic()
+        bucket = self._bucket(name, user_id, times, now)
+        bucket.tokens = min(times, bucket.tokens + (now - bucket.updated) * rate)
+        bucket.updated = now
+        if bucket.tokens < 1:
+            self.limited += 1
+            return (1 - bucket.tokens) / rate
+        if bucket.tokens - 1 >= times * self.sync_below or now < self._redis_down_until:
+            bucket.tokens -= 1
+            bucket.served += 1
+            self.local += 1
+            return 0
+        served, bucket.served = bucket.served, 0
+        try:
+            result = await self._sync(name, user_id, times, seconds, served)
+        except (RedisError, OSError) as e:
+            self._redis_failed(str(e))
+            bucket.served += served
+            result = None
+        else:
+            if result is None:
+                # the script still runs and records ``served``
+                self._redis_failed(f"Rate limit sync of {name} timed out")
+        if result is None:
+            bucket.tokens -= 1
+            bucket.served += 1
+            self.local += 1
+            return 0
+        allowed, used = result
+        self.synced += 1
+        bucket.tokens = max(0.0, times - used)
+        if not allowed:
+            self.limited += 1
+            return 1 / rate
+        return 0
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._redis_down_until = 0.0
+        self.local = 0
+        self.synced = 0
+        self.limited = 0
+        self.redis_errors = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the decision counters of the limiter.
+
+        :return: The limiter statistics.
+        :rtype: dict
+        """
+        return {
+            "buckets": len(self._buckets),
+            "local": self.local,
+            "synced": self.synced,
+            "limited": self.limited,
+            "redis_errors": self.redis_errors,
+        }
+
+
+rate_limiter = RateLimiter(
+    settings.rate_limits,
+    enabled=settings.rate_limit_enabled,
+    sync_below=settings.rate_limit_sync_below,
+    timeout=settings.rate_limit_redis_timeout,
+    retry_after=settings.rate_limit_retry_after,
+    maxsize=settings.rate_limit_max_buckets,
+)
+
+
+class RateLimit:
+    """
+    Route dependency applying the limit configured under ``name`` in
+    ``settings.rate_limits`` to the authenticated user.
+    """
+
+    def __init__(self, name: str, limiter: RateLimiter = rate_limiter):
+        self.name = name
+        self.limiter = limiter
+
+    async def __call__(
+        self, current_user: User = Depends(auth_service.get_current_user)
+    ) -> None:
+        wait = await self.limiter.hit(self.name, current_user.id)
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
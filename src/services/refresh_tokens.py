@@ -0,0 +1,253 @@
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.cache import redis_client
+from src.services.auth import auth_service
+
+# Moves a family to a new token if the presented one is its current token.
+# A token that was already rotated away is being reused, by whoever copied it
+# or by the legitimate client after the copy was used, so the family is revoked.
+ROTATE = """
+local current = redis.call('HGET', KEYS[1], 'jti')
+if not current then
+    return 0
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('HSET', KEYS[1], 'jti', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+ROTATED = 1
+UNKNOWN = 0
+REUSED = -1
+
+
+class TokenStore(ABC):
+    """
+    Store of refresh-token families. A family is created by a login on one
+    device and holds the ID (``jti``) of the only refresh token of that device
+    that may still be used. Families expire ``ttl`` seconds after their last use.
+    """
+
+    @abstractmethod
+    async def create(self, family: str, email: str, jti: str, ttl: int) -> None:
+        """
+        Creates a family.
+
+        :param family: The family ID.
+        :type family: str
+        :param email: The email of the user.
+        :type email: str
+        :param jti: The ID of the first refresh token of the family.
+        :type jti: str
+        :param ttl: The lifetime of the family in seconds.
+        :type ttl: int
+        """
+
+    @abstractmethod
+    async def rotate(self, family: str, jti: str, new_jti: str, ttl: int) -> int:
+        """
+        Atomically replaces the current token of a family.
+
+        :param family: The family ID.
+        :type family: str
+        :param jti: The ID of the presented refresh token.
+        :type jti: str
+        :param new_jti: The ID of the refresh token replacing it.
+        :type new_jti: str
+        :param ttl: The new lifetime of the family in seconds.
+        :type ttl: int
+        :return: ROTATED, UNKNOWN if the family expired or was revoked, or
+            REUSED if the token was already rotated, which revokes the family.
+        :rtype: int
+        """
+
+    @abstractmethod
+    async def revoke(self, family: str) -> None:
+        """
+        Revokes a family, e.g. on logout from one device.
+
+        :param family: The family ID.
+        :type family: str
+        """
+
+
+class RedisTokenStore(TokenStore):
+    """
+    Families as Redis hashes ``refresh:{family}``. Rotation is one EVALSHA.
+    """
+
+    def __init__(self, r=redis_client):
+        self.r = r
+        self.rotate_script = r.register_script(ROTATE)
+
+    async def create(self, family: str, email: str, jti: str, ttl: int) -> None:
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.hset(f"refresh:{family}", mapping={"sub": email, "jti": jti})
+            pipe.expire(f"refresh:{family}", ttl)
+            await pipe.execute()
+
+    async def rotate(self, family: str, jti: str, new_jti: str, ttl: int) -> int:
+        return int(
+            await self.rotate_script(
+                keys=[f"refresh:{family}"], args=[jti, new_jti, ttl]
+            )
+        )
+
+    async def revoke(self, family: str) -> None:
+        await self.r.delete(f"refresh:{family}")
+
+
+class LocalTokenStore(TokenStore):
+    """
+    In-process stand-in of :class:`RedisTokenStore` for tests and single-process
+    development setups.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, Tuple[str, str, float]] = {}
+
+    def _get(self, family: str) -> Tuple[str, str, float] | None:
+        entry = self._families.get(family)
+        if entry is not None and entry[2] <= time.monotonic():
+            del self._families[family]
+            entry = None
+        return entry
+
+    async def create(self, family: str, email: str, jti: str, ttl: int) -> None:
+        self._families[family] = (email, jti, time.monotonic() + ttl)
+
+    async def rotate(self, family: str, jti: str, new_jti: str, ttl: int) -> int:
+        entry = self._get(family)
+        if entry is None:
+            return UNKNOWN
+        email, current, _ = entry
+        if current != jti:
+            del self._families[family]
+            return REUSED
+        self._families[family] = (email, new_jti, time.monotonic() + ttl)
+        return ROTATED
+
+    async def revoke(self, family: str) -> None:
+        self._families.pop(family, None)
+
+
+class RefreshTokens:
+    """
+    Issues and rotates the refresh tokens, whose ``fid`` and ``jti`` claims
+    point into the token store. Neither needs the database.
+    """
+
+    def __init__(self, store: TokenStore, ttl: int):
+        self.store = store
+        self.ttl = ttl
+        self.rotated = 0
+        self.reused = 0
+
+    async def issue(self, email: str) -> Tuple[str, str]:
+        """
+        Starts a new family, for a login, and returns its first refresh token.
+
+        :param email: The email of the user.
+        :type email: str
+        :return: The family ID and the encoded refresh token.
+        :rtype: Tuple[str, str]
+        :raises HTTPException: If the token store is unavailable.
+        """
+        family, jti = uuid.uuid4().hex, uuid.uuid4().hex
+        try:
+            await self.store.create(family, email, jti, self.ttl)
+        except (RedisError, OSError) as e:
+            print(e)
+            raise unavailable()
+        token = await auth_service.create_refresh_token(
+            data={"sub": email, "fid": family, "jti": jti}, expires_delta=self.ttl
+        )
+        return family, token
+
+    async def rotate(self, token: str) -> Tuple[str, str, str]:
+        """
+        Exchanges a refresh token for the next one of its family.
+
+        :param token: The presented refresh token.
+        :type token: str
+        :return: The email of the user, the family ID and the new refresh token.
+        :rtype: Tuple[str, str, str]
+        :raises HTTPException: If the token is invalid, expired, revoked or was
+            already used, or if the token store is unavailable.
+        """
+        payload = await auth_service.decode_refresh_token(token)
+        email, family, jti = payload["sub"], payload.get("fid"), payload.get("jti")
+        if family is None or jti is None:
+            raise invalid_refresh_token()
+        new_jti = uuid.uuid4().hex
+        try:
+            result = await self.store.rotate(family, jti, new_jti, self.ttl)
+        except (RedisError, OSError) as e:
+            print(e)
+            raise unavailable()
+        if result == REUSED:
+            self.reused += 1
+        if result != ROTATED:
+            raise invalid_refresh_token()
+        self.rotated += 1
+        new_token = await auth_service.create_refresh_token(
+            data={"sub": email, "fid": family, "jti": new_jti},
+            expires_delta=self.ttl,
+        )
+        return email, family, new_token
+
+    async def revoke(self, family: str) -> None:
+        """
+        Revokes a family, so that its refresh token can no longer be used.
+
+        :param family: The family ID.
+        :type family: str
+        :raises HTTPException: If the token store is unavailable.
+        """
+        try:
+            await self.store.revoke(family)
+        except (RedisError, OSError) as e:
+            print(e)
+            raise unavailable()
+
+    def stats(self) -> dict:
+        """
+        Returns the rotation counters.
+
+        :return: The refresh token statistics.
+        :rtype: dict
+        """
+        return {"rotated": self.rotated, "reused": self.reused}
+
+
+def invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+    )
+
+
+def unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Token store unavailable",
+    )
+
+
+def make_store() -> TokenStore:
+    if settings.refresh_token_store == "local":
+        return LocalTokenStore()
+    return RedisTokenStore()
+
+
+refresh_tokens = RefreshTokens(make_store(), settings.refresh_token_ttl)
@@ -0,0 +1,114 @@
+import hashlib
+
+from fastapi import Request, Response
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.cache import redis_client
+
+
+class ResponseCache:
+    """
+    Opt-in Redis cache of the encoded JSON bodies of the list routes.
+
+    Keys are derived from the collection ETag set by
+    :meth:`src.services.collection_versions.CollectionVersions.not_modified`,
+    which carries the user ID and the collection version, and from the query
+    parameters. A write bumps the version, so later requests look up new keys
+    and the old entries simply expire after ``ttl`` seconds. Bodies larger
+    than ``max_bytes`` are not cached.
+    """
+
+    def __init__(self, enabled: bool, ttl: int, max_bytes: int, r=redis_client):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.r = r
+        self.hits = 0
+        self.misses = 0
+        self.too_large = 0
+
+    def key(self, collection: str, request: Request, response: Response) -> str | None:
+        """
+        Returns the cache key of a list request.
+
+        :param collection: The collection name.
+        :type collection: str
+        :param request: The incoming request.
+        :type request: Request
+        :param response: The response of the route, carrying the collection ETag.
+        :type response: Response
+        :return: The key, or None if the cache is disabled or there is no ETag.
+        :rtype: str | None
+        """
+        etag = response.headers.get("etag")
+        if not self.enabled or etag is None:
+            return None
+        params = sorted(request.query_params.multi_items())
+        digest = hashlib.sha256(repr((etag, params)).encode()).hexdigest()
+        return f"response:{collection}:{digest}"
+
+    async def get(self, key: str) -> bytes | None:
+        """
+        Returns a cached body.
+
+        :param key: The cache key.
+        :type key: str
+        :return: The encoded JSON body, or None on a miss or if Redis is unavailable.
+        :rtype: bytes | None
+        """
+        try:
+            body = await self.r.get(key)
+        except (RedisError, OSError) as e:
+            print(e)
+            body = None
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+    async def set(self, key: str, body: bytes) -> None:
+        """
+        Caches a body for ``ttl`` seconds unless it is larger than ``max_bytes``.
+
+        :param key: The cache key.
+        :type key: str
+        :param body: The encoded JSON body.
+        :type body: bytes
+        """
+        if len(body) > self.max_bytes:
+            self.too_large += 1
+            return
+        try:
+            await self.r.set(key, body, ex=self.ttl)
+        except (RedisError, OSError) as e:
+            print(e)
+
+    def clear(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.too_large = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters of the cache.
+
+        :return: The cache statistics.
+        :rtype: dict
+        """
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "too_large": self.too_large,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+response_cache = ResponseCache(
+    settings.response_cache_enabled,
+    settings.response_cache_ttl,
+    settings.response_cache_max_bytes,
+)
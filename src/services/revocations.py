@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import math
+import time
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.cache import redis_client
+
+REVOCATION_CHANNEL = "revocations"
+# Sorted set of the revoked token IDs, scored by the expiry of the token
+REVOCATIONS_KEY = "revocations"
+
+
+class BloomFilter:
+    """
+    Set of strings without false negatives, and with false positives at about
+    ``error_rate`` until ``capacity`` items were added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # double hashing: k positions out of one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class Revocations:
+    """
+    Revoked access tokens, by their ``jti`` claim.
+
+    A revocation is stored in Redis under ``revoked:{jti}`` until the token
+    expires, indexed in the ``revocations`` sorted set and published to the
+    other workers. Every worker mirrors the unexpired revocations into a Bloom
+    filter, rebuilt from the sorted set every ``sync_interval`` seconds and
+    updated from the channel in between, so checking a token that was not
+    revoked needs no round-trip. Only filter hits are confirmed in Redis.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        sync_interval: float,
+        r=redis_client,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.r = r
+        self.filter = BloomFilter(capacity, error_rate)
+        self.checks = 0
+        self.filter_hits = 0
+        self.revoked = 0
+        self._pending: Optional[List[str]] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _add(self, jti: str) -> None:
+        self.filter.add(jti)
+        if self._pending is not None:
+            self._pending.append(jti)
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        """
+        Revokes an access token until it expires.
+
+        :param jti: The ID of the token.
+        :type jti: str
+        :param exp: The expiry of the token, as a Unix timestamp.
+        :type exp: float
+        :raises HTTPException: If Redis is unavailable.
+        """
+        now = time.time()
+        ttl = math.ceil(exp - now)
+        if ttl <= 0:
+            return
+        self._add(jti)
+        try:
+            async with self.r.pipeline(transaction=True) as pipe:
+                pipe.set(f"revoked:{jti}", 1, ex=ttl)
+                pipe.zadd(REVOCATIONS_KEY, {jti: exp})
+                pipe.zremrangebyscore(REVOCATIONS_KEY, "-inf", now)
+                pipe.publish(REVOCATION_CHANNEL, jti)
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Token store unavailable",
+            )
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Checks whether an access token was revoked.
+
+        :param jti: The ID of the token.
+        :type jti: str
+        :return: True if the token was revoked, or if the filter matches and
+            Redis cannot tell otherwise.
+        :rtype: bool
+        """
+        self.checks += 1
+        if jti not in self.filter:
+            return False
+        self.filter_hits += 1
+        try:
+            revoked = await self.r.exists(f"revoked:{jti}")
+        except (RedisError, OSError) as e:
+            print(e)
+            return True
+        if revoked:
+            self.revoked += 1
+        return bool(revoked)
+
+    async def sync(self) -> None:
+        """
+        Rebuilds the filter from the unexpired revocations in Redis, which also
+        drops the expired ones.
+        """
+        self._pending = []
+        try:
+            jtis = await self.r.zrangebyscore(REVOCATIONS_KEY, time.time(), "+inf")
+            bloom = BloomFilter(max(self.capacity, len(jtis)), self.error_rate)
+            for jti in jtis:
+                bloom.add(jti.decode() if isinstance(jti, bytes) else jti)
+            # added while the set was being read
+            for jti in self._pending:
+                bloom.add(jti)
+            self.filter = bloom
+        finally:
+            self._pending = None
+
+    async def listen(self) -> None:
+        """
+        Subscribes to the revocation channel, adds every published ID to the
+        filter and rebuilds the filter every ``sync_interval`` seconds.
+        Reconnects and rebuilds after Redis errors.
+        """
+        while True:
+            pubsub = self.r.pubsub()
+            try:
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                # subscribed first, so nothing revoked during the sync is missed
+                await self.sync()
+                next_sync = time.monotonic() + self.sync_interval
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True,
+                        timeout=max(0.0, next_sync - time.monotonic()),
+                    )
+                    if message is not None and message["type"] == "message":
+                        jti = message["data"]
+                        self._add(jti.decode() if isinstance(jti, bytes) else jti)
+                    if time.monotonic() >= next_sync:
+                        await self.sync()
+                        next_sync = time.monotonic() + self.sync_interval
+            except (RedisError, OSError) as e:
+                print(e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    def start_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self.listen())
+
+    async def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def stats(self) -> dict:
+        """
+        Returns the check counters and the size of the filter.
+
+        :return: The revocation statistics.
+        :rtype: dict
+        """
+        return {
+            "filter_items": self.filter.count,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "revoked": self.revoked,
+        }
+
+
+revocations = Revocations(
+    settings.revocation_filter_capacity,
+    settings.revocation_filter_error_rate,
+    settings.revocation_sync_interval,
+)
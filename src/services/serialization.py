@@ -0,0 +1,100 @@
+from typing import Iterable, List
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from src.database.models import Note, Tag
+
+
+def tag_to_dict(tag: Tag) -> dict:
+    """
+    Projects a tag onto the shape of :class:`src.schemas.TagResponse`.
+
+    :param tag: The tag.
+    :type tag: Tag
+    :return: The projected tag.
+    :rtype: dict
+    """
+    return {"name": tag.name, "id": tag.id}
+
+
+def note_to_dict(note: Note) -> dict:
+    """
+    Projects a note, with its loaded tags, onto the shape of
+    :class:`src.schemas.NoteResponse`.
+
+    :param note: The note.
+    :type note: Note
+    :return: The projected note.
+    :rtype: dict
+    """
+    return {
+        "title": note.title,
+        "description": note.description,
+        "done": note.done,
+        "id": note.id,
+        "created_at": note.created_at,
+        "tags": [{"name": tag.name, "id": tag.id} for tag in note.tags],
+    }
+
+
+def dump_notes(notes: Iterable[Note]) -> bytes:
+    """
+    Encodes a list of notes as the JSON of ``List[NoteResponse]``.
+
+    :param notes: The notes.
+    :type notes: Iterable[Note]
+    :return: The encoded JSON.
+    :rtype: bytes
+    """
+    return orjson.dumps([note_to_dict(note) for note in notes])
+
+
+def dump_tags(tags: Iterable[Tag]) -> bytes:
+    """
+    Encodes a list of tags as the JSON of ``List[TagResponse]``.
+
+    :param tags: The tags.
+    :type tags: Iterable[Tag]
+    :return: The encoded JSON.
+    :rtype: bytes
+    """
+    return orjson.dumps([tag_to_dict(tag) for tag in tags])
+
+
+def dump_page(items: List[dict], next_cursor: str | None) -> bytes:
+    """
+    Encodes projected items as the JSON of a cursor page.
+
+    :param items: The projected items.
+    :type items: List[dict]
+    :param next_cursor: The cursor of the next page.
+    :type next_cursor: str | None
+    :return: The encoded JSON.
+    :rtype: bytes
+    """
+    return orjson.dumps({"items": items, "next_cursor": next_cursor})
+
+
+def json_response(body: bytes, response: Response) -> Response:
+    """
+    Wraps an encoded body in a response that keeps the headers set by the route.
+
+    This is the fast path of the hot list routes: rows are projected straight
+    into dicts and encoded with orjson instead of being validated against
+    ``response_model`` in ``orm_mode``, re-encoded with ``jsonable_encoder`` and
+    dumped by the stdlib encoder. A route opts in by declaring
+    ``response_class=ORJSONResponse`` and returning this response; its
+    ``response_model`` then only documents the schema.
+
+    :param body: The encoded JSON.
+    :type body: bytes
+    :param response: The response of the route.
+    :type response: Response
+    :return: The response to return from the route.
+    :rtype: Response
+    """
+    return Response(
+        content=body, media_type=ORJSONResponse.media_type, headers=response.headers
+    )
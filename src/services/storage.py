@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import io
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cloudinary
+import cloudinary.exceptions
+import cloudinary.uploader
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps
+
+from src.conf.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+
+class Storage(ABC):
+    """
+    Blocking storage backend of the avatars. Keys are content-addressed, so the
+    object stored under a key never changes and ``put`` may skip existing keys.
+    """
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """
+        Returns the public URL of a key, whether or not it is stored yet.
+
+        :param key: The key of the image.
+        :type key: str
+        :return: The URL.
+        :rtype: str
+        """
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Stores a JPEG image under a key.
+
+        :param key: The key of the image.
+        :type key: str
+        :param data: The encoded image.
+        :type data: bytes
+        """
+
+
+class CloudinaryStorage(Storage):
+    """
+    Stores the avatars on Cloudinary. The client is configured once.
+    """
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str):
+        cloudinary.config(
+            cloud_name=cloud_name, api_key=api_key, api_secret=api_secret, secure=True
+        )
+
+    def url(self, key: str) -> str:
+        return cloudinary.CloudinaryImage(key).build_url(format="jpg")
+
+    def put(self, key: str, data: bytes) -> None:
+        cloudinary.uploader.upload(io.BytesIO(data), public_id=key, overwrite=False)
+
+
+class LocalStorage(Storage):
+    """
+    Stores the avatars as files under ``root``, served from ``base_url``.
+    """
+
+    def __init__(self, root: str | Path, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        """
+        Returns the file of a key.
+
+        :param key: The key of the image.
+        :type key: str
+        :return: The path of the file.
+        :rtype: Path
+        :raises ValueError: If the key points outside of ``root``.
+        """
+        path = (self.root / f"{key}.jpg").resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Key {key!r} is outside of the storage root")
+        return path
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}.jpg"
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self.path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+
+def make_thumbnail(data: bytes, size: int) -> bytes:
+    """
+    Crops an image to a centered square and scales it down to ``size`` pixels,
+    like Cloudinary's ``crop="fill"``, and encodes it as JPEG.
+
+    :param data: The uploaded image.
+    :type data: bytes
+    :param size: The width and height of the thumbnail.
+    :type size: int
+    :return: The encoded thumbnail.
+    :rtype: bytes
+    :raises ValueError: If the data is not an image Pillow can read.
+    """
+    try:
+        return _make_thumbnail(data, size)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(str(e)) from e
+
+
+def _make_thumbnail(data: bytes, size: int) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEG can be decoded at 1/2, 1/4 or 1/8 scale, far cheaper than full size
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    thumbnail.save(out, "JPEG", quality=85, optimize=True)
+    return out.getvalue()
+
+
+class AvatarStorage:
+    """
+    Avatar pipeline: the upload is read in chunks and hashed, then resized to the
+    thumbnail and handed to the backend on a dedicated thread pool, so neither
+    the resize nor a slow upload blocks the event loop. Keys are derived from
+    the hash of the uploaded bytes, so uploading the same image twice is a no-op.
+    """
+
+    def __init__(
+        self, backend: Storage, size: int, max_bytes: int, workers: int = 4
+    ):
+        self.backend = backend
+        self.size = size
+        self.max_bytes = max_bytes
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="avatars"
+        )
+
+    async def read(self, file: UploadFile) -> tuple[bytes, str]:
+        """
+        Reads an uploaded file and computes its SHA-256 digest.
+
+        :param file: The uploaded file.
+        :type file: UploadFile
+        :return: The content of the file and its hex digest.
+        :rtype: tuple[bytes, str]
+        :raises HTTPException: If the file is larger than ``max_bytes``.
+        """
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        while chunk := await file.read(CHUNK_SIZE):
+            digest.update(chunk)
+            buffer += chunk
+            if len(buffer) > self.max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Image too large",
+                )
+        return bytes(buffer), digest.hexdigest()
+
+    def key(self, user_id: int, digest: str) -> str:
+        """
+        Returns the storage key of an avatar. Usernames are free text, so the
+        key is built from the user ID.
+
+        :param user_id: The ID of the owner.
+        :type user_id: int
+        :param digest: The hex digest of the uploaded image.
+        :type digest: str
+        :return: The key.
+        :rtype: str
+        """
+        return f"NotesApp/{user_id}/{digest[:32]}"
+
+    def url(self, key: str) -> str:
+        return self.backend.url(key)
+
+    def _store(self, key: str, data: bytes) -> None:
+        self.backend.put(key, make_thumbnail(data, self.size))
+
+    async def store(self, key: str, data: bytes) -> str:
+        """
+        Resizes an image and stores it under a key, off the event loop.
+
+        :param key: The key of the avatar.
+        :type key: str
+        :param data: The uploaded image.
+        :type data: bytes
+        :return: The URL of the stored avatar.
+        :rtype: str
+        :raises HTTPException: If the data is not a readable image or the backend
+            failed.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self._store, key, data)
+        except ValueError as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image"
+            )
+        except (cloudinary.exceptions.Error, OSError) as e:
+            print(e)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Avatar storage unavailable",
+            )
+        return self.url(key)
+
+
+def make_backend() -> Storage:
+    if settings.avatar_storage == "local":
+        return LocalStorage(settings.avatar_storage_path, settings.avatar_storage_url)
+    return CloudinaryStorage(
+        settings.cloudinary_name,
+        settings.cloudinary_api_key,
+        settings.cloudinary_api_secret,
+    )
+
+
+avatar_storage = AvatarStorage(
+    make_backend(),
+    settings.avatar_size,
+    settings.avatar_max_bytes,
+    settings.avatar_upload_workers,
+)
@@ -0,0 +1,85 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+from src.conf.config import settings
+
+
+class TokenCache:
+    """
+    Bounded in-process cache of claims of already verified JWTs.
+
+    Entries are keyed by the SHA-256 digest of the token, so the raw bearer
+    token is never kept in memory, and live until the token's ``exp`` claim.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[bytes, dict] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        """
+        Returns the claims of a previously verified token that has not expired yet.
+
+        :param token: The encoded JWT.
+        :type token: str
+        :return: The decoded claims, or None.
+        :rtype: dict | None
+        """
+        key = self._key(token)
+        claims = self._data.get(key)
+        if claims is None or claims["exp"] <= time.time():
+            if claims is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def set(self, token: str, claims: dict) -> None:
+        """
+        Stores the claims of a verified token. Tokens without ``exp`` are not cached.
+
+        :param token: The encoded JWT.
+        :type token: str
+        :param claims: The decoded claims.
+        :type claims: dict
+        """
+        if "exp" not in claims:
+            return
+        key = self._key(token)
+        self._data[key] = claims
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters and the current size of the cache.
+
+        :return: The cache statistics.
+        :rtype: dict
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+token_cache = TokenCache(settings.token_cache_size)
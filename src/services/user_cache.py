@@ -0,0 +1,243 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+
+import orjson
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.cache import redis_client
+
+INVALIDATION_CHANNEL = "user-cache:invalidate"
+CACHED_USER_VERSION = 1
+
+
+class CachedUser:
+    """
+    Lightweight projection of a :class:`src.database.models.User` holding only
+    the fields routes need. Password hash and refresh token are never cached.
+    """
+
+    __slots__ = ("id", "username", "email", "avatar", "confirmed", "created_at")
+
+    def __init__(
+        self,
+        id: int,
+        username: str,
+        email: str,
+        avatar: str | None,
+        confirmed: bool,
+        created_at: datetime | None,
+    ):
+        self.id = id
+        self.username = username
+        self.email = email
+        self.avatar = avatar
+        self.confirmed = confirmed
+        self.created_at = created_at
+
+    @classmethod
+    def from_user(cls, user) -> "CachedUser":
+        """
+        Builds the projection from an ORM user.
+
+        :param user: The user to project.
+        :type user: User
+        :return: The cached user.
+        :rtype: CachedUser
+        """
+        return cls(
+            user.id,
+            user.username,
+            user.email,
+            user.avatar,
+            bool(user.confirmed),
+            user.created_at,
+        )
+
+
+def encode_user(user: CachedUser) -> bytes:
+    """
+    Serializes a cached user as a compact versioned JSON array.
+
+    :param user: The user to serialize.
+    :type user: CachedUser
+    :return: The encoded user.
+    :rtype: bytes
+    """
+    return orjson.dumps(
+        [
+            CACHED_USER_VERSION,
+            user.id,
+            user.username,
+            user.email,
+            user.avatar,
+            user.confirmed,
+            user.created_at,
+        ]
+    )
+
+
+def decode_user(data: bytes) -> CachedUser | None:
+    """
+    Deserializes a user produced by :func:`encode_user`.
+
+    :param data: The encoded user.
+    :type data: bytes
+    :return: The cached user, or None if the data is from another version or malformed.
+    :rtype: CachedUser | None
+    """
+    try:
+        fields = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return None
+    if (
+        not isinstance(fields, list)
+        # the version, then the fields of the user
+        or len(fields) != len(CachedUser.__slots__) + 1
+        or fields[0] != CACHED_USER_VERSION
+    ):
+        return None
+    _, id, username, email, avatar, confirmed, created_at = fields
+    if created_at is not None:
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            return None
+    return CachedUser(id, username, email, avatar, confirmed, created_at)
+
+
+class UserCache:
+    """
+    Bounded in-process LRU cache of authenticated users keyed by email.
+
+    It sits in front of the Redis ``user:{email}`` entries, so every entry has
+    a short TTL and is dropped on every worker whenever the user row changes.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, r=redis_client):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.r = r
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._listener: Optional[asyncio.Task] = None
+
+    def get(self, email: str) -> Any | None:
+        """
+        Returns the cached user for the email, or None on a miss or expired entry.
+
+        :param email: The email of the user.
+        :type email: str
+        :return: The cached user, or None.
+        :rtype: Any | None
+        """
+        entry = self._data.get(email)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[email]
+            self.misses += 1
+            return None
+        self._data.move_to_end(email)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, email: str, user: Any) -> None:
+        """
+        Stores a user, evicting the least recently used entry when the cache is full.
+
+        :param email: The email of the user.
+        :type email: str
+        :param user: The user to cache.
+        :type user: Any
+        """
+        self._data[email] = (time.monotonic() + self.ttl, user)
+        self._data.move_to_end(email)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def evict(self, email: str) -> None:
+        """
+        Drops the email from this worker's cache only.
+
+        :param email: The email of the user.
+        :type email: str
+        """
+        self._data.pop(email, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    async def invalidate(self, email: str) -> None:
+        """
+        Drops the user from this worker, from Redis and, via pub/sub, from every other worker.
+
+        :param email: The email of the user.
+        :type email: str
+        """
+        self.evict(email)
+        try:
+            await self.r.delete(f"user:{email}")
+            await self.r.publish(INVALIDATION_CHANNEL, email)
+        except (RedisError, OSError) as e:
+            print(e)
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters and the current size of the cache.
+
+        :return: The cache statistics.
+        :rtype: dict
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    async def listen(self) -> None:
+        """
+        Subscribes to the invalidation channel and evicts every email published on it.
+        Reconnects after Redis errors.
+        """
+        while True:
+            pubsub = self.r.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything published while we were disconnected is lost.
+                self._data.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        email = message["data"]
+                        if isinstance(email, bytes):
+                            email = email.decode()
+                        self.evict(email)
+            except (RedisError, OSError) as e:
+                print(e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.reset()
+
+    def start_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self.listen())
+
+    async def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+user_cache = UserCache(settings.user_cache_size, settings.user_cache_ttl)
@@ -1,12 +1,20 @@
 
+import shutil
+from unittest.mock import AsyncMock, patch
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from main import app
-from src.database.models import Base
-from src.database.db import get_db
+from src.database.models import Base, User
+from src.database.db import get_db, get_read_db
+from src.services.collection_versions import collection_versions
+from src.services.rate_limit import rate_limiter
+from src.services.refresh_tokens import LocalTokenStore, refresh_tokens
 
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -16,6 +24,15 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient runs every request in its own event loop, so the async engine
+# must not keep aiosqlite connections around between requests.
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test.db", poolclass=NullPool
+)
+AsyncTestingSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 
 @pytest.fixture(scope="module")
 def session():
@@ -35,18 +52,102 @@ def session():
 def client(session):
     # Dependency override
 
-    def override_get_db():
-        try:
-            yield session
-        finally:
-            session.close()
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
 
-    yield TestClient(app)
+    with patch.object(refresh_tokens, "store", LocalTokenStore()):
+        yield TestClient(app)
 
 
 @pytest.fixture(scope="module")
 def user():
     return {"username": "deadpool", "email": "deadpool@example.com", "password": "123456789"}
 
+
+
+@pytest.fixture()
+def token(client, user, session):
+    client.post("/api/auth/signup", json=user)
+    current_user: User = session.query(User).filter(User.email == user.get('email')).first()
+    current_user.confirmed = True
+    session.commit()
+    response = client.post(
+        "/api/auth/login",
+        data={"username": user.get('email'), "password": user.get('password')},
+    )
+    data = response.json()
+    return data["access_token"]
+
+
+@pytest.fixture()
+def limiter():
+    # Fresh buckets, and every sync with Redis reports an empty window
+    r_mock = AsyncMock()
+    r_mock.evalsha.return_value = [1, 1]
+    rate_limiter.clear()
+    with patch.object(rate_limiter, "r", r_mock):
+        yield r_mock
+    rate_limiter.clear()
+
+
+@pytest.fixture()
+def queries():
+    # SQL statements the application sends to the database during the test
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture()
+def versions():
+    # In-memory stand-in for the Redis counters behind the collection ETags
+    store = {}
+
+    async def get(key):
+        return store.get(key)
+
+    async def set(key, value, nx=False, ex=None):
+        if nx and key in store:
+            return None
+        store[key] = value
+        return True
+
+    async def incr(key):
+        store[key] = int(store.get(key, 0)) + 1
+        return store[key]
+
+    r_mock = AsyncMock()
+    r_mock.get.side_effect = get
+    r_mock.set.side_effect = set
+    r_mock.incr.side_effect = incr
+    with patch.object(collection_versions, "r", r_mock):
+        yield store
+
+
+@pytest.fixture()
+def lagging_replica(client, tmp_path):
+    # Read sessions see the database as it is now, like a replica that stopped
+    # replicating: writes made later in the test only reach the primary.
+    shutil.copy("test.db", tmp_path / "replica.db")
+    replica_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool
+    )
+    ReplicaSession = async_sessionmaker(
+        replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_read_db():
+        async with ReplicaSession() as db:
+            yield db
+
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    yield
+    del app.dependency_overrides[get_read_db]
@@ -1,11 +1,14 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from src.database.models import User
+from src.database.models import EmailOutbox, User
+from src.services.auth import auth_service
+from src.services.email import email_worker
+from src.services.revocations import BloomFilter, revocations
 
 
-def test_create_user(client, user, monkeypatch):
-    mock_send_email = MagicMock()
-    monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
+def test_create_user(client, user, session, monkeypatch, queries):
+    mock_notify = MagicMock()
+    monkeypatch.setattr(email_worker, "notify", mock_notify)
     response = client.post(
         "/api/auth/signup",
         json=user,
@@ -14,9 +17,16 @@ def test_create_user(client, user, monkeypatch):
     data = response.json()
     assert data["user"]["email"] == user.get("email")
     assert "id" in data["user"]
+    email = session.query(EmailOutbox).filter(EmailOutbox.recipient == user.get("email")).one()
+    assert email.sent_at is None
+    assert email.next_attempt_at is not None
+    mock_notify.assert_called_once()
+    user_statements = [q for q in queries if "users" in q]
+    assert len(user_statements) == 1
+    assert user_statements[0].startswith("INSERT INTO users")
 
 
-def test_repeat_create_user(client, user):
+def test_repeat_create_user(client, user, session):
     response = client.post(
         "/api/auth/signup",
         json=user,
@@ -24,6 +34,7 @@ def test_repeat_create_user(client, user):
     assert response.status_code == 409, response.text
     data = response.json()
     assert data["detail"] == "Account already exists"
+    assert session.query(EmailOutbox).filter(EmailOutbox.recipient == user.get("email")).count() == 1
 
 
 def test_login_user_not_confirmed(client, user):
@@ -67,3 +78,63 @@ def test_login_wrong_email(client, user):
     assert response.status_code == 401, response.text
     data = response.json()
     assert data["detail"] == "Invalid email"
+
+
+def test_refresh_token(client, user, queries):
+    response = client.post(
+        "/api/auth/login",
+        data={"username": user.get('email'), "password": user.get('password')},
+    )
+    first = response.json()["refresh_token"]
+    assert not any("UPDATE users" in q for q in queries)
+    response = client.get(
+        "/api/auth/refresh_token", headers={"Authorization": f"Bearer {first}"}
+    )
+    assert response.status_code == 200, response.text
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert not any("UPDATE users" in q for q in queries)
+    # reusing the rotated token revokes the whole device family
+    response = client.get(
+        "/api/auth/refresh_token", headers={"Authorization": f"Bearer {first}"}
+    )
+    assert response.status_code == 401, response.text
+    assert response.json()["detail"] == "Invalid refresh token"
+    response = client.get(
+        "/api/auth/refresh_token", headers={"Authorization": f"Bearer {second}"}
+    )
+    assert response.status_code == 401, response.text
+
+
+def test_logout(client, user, monkeypatch):
+    r_mock = MagicMock()
+    r_mock.exists = AsyncMock(return_value=1)
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    r_mock.pipeline.return_value.__aenter__.return_value = pipe
+    monkeypatch.setattr(revocations, "r", r_mock)
+    monkeypatch.setattr(revocations, "filter", BloomFilter(1000, 0.001))
+    response = client.post(
+        "/api/auth/login",
+        data={"username": user.get('email'), "password": user.get('password')},
+    )
+    tokens = response.json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as auth_r:
+        auth_r.get.return_value = None
+        response = client.post("/api/auth/logout", headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["message"] == "Successfully logged out"
+        jti = auth_service.token_cache.get(tokens["access_token"])["jti"]
+        pipe.set.assert_called_once()
+        assert pipe.set.call_args.args[0] == f"revoked:{jti}"
+        # the access token is rejected from now on
+        response = client.get("/api/users/me/", headers=headers)
+        assert response.status_code == 401, response.text
+        r_mock.exists.assert_awaited_with(f"revoked:{jti}")
+    # and so is the refresh token of the device
+    response = client.get(
+        "/api/auth/refresh_token",
+        headers={"Authorization": f"Bearer {tokens['refresh_token']}"},
+    )
+    assert response.status_code == 401, response.text
@@ -0,0 +1,12 @@
+def test_read_metrics(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    assert "# TYPE db_pool_wait_seconds histogram" in lines
+    assert any(line.startswith("db_pool_checked_out ") for line in lines)
+    assert any(line.startswith("user_cache_hit_ratio ") for line in lines)
+    assert any(line.startswith("response_cache_hits ") for line in lines)
+    assert any(line.startswith("rate_limit_synced ") for line in lines)
+    assert any(line.startswith("refresh_tokens_reused ") for line in lines)
+    assert any(line.startswith("revocations_filter_hits ") for line in lines)
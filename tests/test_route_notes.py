@@ -0,0 +1,515 @@
+import gzip
+from unittest.mock import AsyncMock, patch
+
+import orjson
+import pytest
+
+from src.services.auth import auth_service
+from src.services.collection_versions import collection_versions
+from src.services.response_cache import response_cache
+from src.services.user_cache import user_cache
+
+
+@pytest.fixture(autouse=True)
+def no_redis(limiter, versions):
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
+        r_mock.get.return_value = None
+        yield r_mock
+
+
+@pytest.fixture()
+def tag_ids(client, token):
+    response = client.get("/api/tags", headers={"Authorization": f"Bearer {token}"})
+    if response.json():
+        return [tag["id"] for tag in response.json()]
+    ids = []
+    for name in ("work", "home", "urgent"):
+        response = client.post(
+            "/api/tags",
+            json={"name": name},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+
+def test_create_note(client, token, tag_ids):
+    response = client.post(
+        "/api/notes",
+        json={"title": "test_note", "description": "test description", "tags": tag_ids},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 201, response.text
+    data = response.json()
+    assert data["title"] == "test_note"
+    assert sorted(tag["id"] for tag in data["tags"]) == sorted(tag_ids)
+    assert "id" in data
+
+
+def test_get_note(client, token, tag_ids):
+    response = client.get(
+        "/api/notes/1",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["title"] == "test_note"
+    assert len(data["tags"]) == len(tag_ids)
+
+
+def test_get_note_not_found(client, token):
+    response = client.get(
+        "/api/notes/2",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404, response.text
+    data = response.json()
+    assert data["detail"] == "Note not found"
+
+
+def test_get_notes_query_count(client, token, tag_ids, queries):
+    for i in range(9):
+        client.post(
+            "/api/notes",
+            json={"title": f"note_{i}", "description": "description", "tags": tag_ids},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+    counts = []
+    for limit in (1, 10):
+        user_cache.clear()
+        queries.clear()
+        response = client.get(
+            "/api/notes",
+            params={"limit": limit},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert len(data) == limit
+        assert all(len(note["tags"]) == len(tag_ids) for note in data)
+        counts.append(len(queries))
+    # user, notes and one batched SELECT for the tags of the whole page
+    assert counts == [3, 3]
+
+
+def test_update_note(client, token, tag_ids):
+    response = client.put(
+        "/api/notes/1",
+        json={
+            "title": "new_test_note",
+            "description": "new description",
+            "tags": tag_ids[:1],
+            "done": True,
+        },
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["title"] == "new_test_note"
+    assert [tag["id"] for tag in data["tags"]] == tag_ids[:1]
+
+
+def test_delete_note(client, token):
+    response = client.delete(
+        "/api/notes/1",
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["title"] == "new_test_note"
+
+
+def test_create_notes_bulk(client, token, tag_ids, queries):
+    user_cache.clear()
+    response = client.post(
+        "/api/notes/bulk",
+        json=[
+            {"title": f"bulk_{i}", "description": "bulk", "tags": tag_ids[: i % 3]}
+            for i in range(20)
+        ],
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 201, response.text
+    data = response.json()
+    assert [item["status"] for item in data] == ["created"] * 20
+    assert [item["note"]["title"] for item in data] == [f"bulk_{i}" for i in range(20)]
+    assert [len(item["note"]["tags"]) for item in data] == [i % 3 for i in range(20)]
+    assert all(item["id"] == item["note"]["id"] for item in data)
+    # user, tags and tag links, whatever the batch size. PostgreSQL also inserts
+    # the notes in one statement; SQLite cannot return the generated ids of a
+    # multi-row INSERT in parameter order, so SQLAlchemy sends one per note here.
+    assert len([q for q in queries if not q.startswith("INSERT INTO notes")]) == 3
+    assert queries[-1].startswith("INSERT INTO note_m2m_tag")
+
+
+def test_update_notes_bulk(client, token, tag_ids):
+    notes = client.get(
+        "/api/notes", params={"limit": 2}, headers={"Authorization": f"Bearer {token}"}
+    ).json()
+    response = client.patch(
+        "/api/notes/bulk",
+        json=[
+            {"id": notes[0]["id"], "done": True},
+            {"id": notes[1]["id"], "title": "renamed", "tags": tag_ids[-1:]},
+            {"id": 9999, "done": True},
+        ],
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [item["status"] for item in data] == ["updated", "updated", "not_found"]
+    assert data[0]["note"]["done"] is True
+    assert data[0]["note"]["title"] == notes[0]["title"]
+    assert data[1]["note"]["title"] == "renamed"
+    assert [tag["id"] for tag in data[1]["note"]["tags"]] == tag_ids[-1:]
+    assert data[2]["note"] is None
+
+
+def test_update_notes_bulk_null(client, token):
+    notes = client.get(
+        "/api/notes", params={"limit": 1}, headers={"Authorization": f"Bearer {token}"}
+    ).json()
+    for field in ("title", "description", "done"):
+        response = client.patch(
+            "/api/notes/bulk",
+            json=[{"id": notes[0]["id"], field: None}],
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 422, response.text
+        assert response.json()["detail"][0]["loc"][-1] == field
+
+
+def test_remove_notes_bulk(client, token):
+    notes = client.get(
+        "/api/notes", params={"limit": 2}, headers={"Authorization": f"Bearer {token}"}
+    ).json()
+    ids = [note["id"] for note in notes]
+    response = client.request(
+        "DELETE",
+        "/api/notes/bulk",
+        json=ids + [9999],
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [item["status"] for item in data] == ["deleted", "deleted", "not_found"]
+    response = client.get(
+        f"/api/notes/{ids[0]}", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404, response.text
+
+
+def test_bulk_too_many_items(client, token):
+    response = client.request(
+        "DELETE",
+        "/api/notes/bulk",
+        json=list(range(1001)),
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 422, response.text
+
+
+def test_search_notes(client, token):
+    for title, description in (
+        ("groceries", "buy milk and bread"),
+        ("milk", "milk milk, milk everywhere"),
+        ("meeting", "discuss the budget"),
+    ):
+        client.post(
+            "/api/notes",
+            json={"title": title, "description": description, "tags": []},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    response = client.get(
+        "/api/notes/search",
+        params={"q": "milk"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [note["title"] for note in data] == ["milk", "groceries"]
+
+    response = client.get(
+        "/api/notes/search",
+        params={"q": "milk bread", "limit": 1},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert [note["title"] for note in response.json()] == ["groceries"]
+
+
+def test_search_notes_after_update(client, token):
+    note = client.get(
+        "/api/notes/search",
+        params={"q": "budget"},
+        headers={"Authorization": f"Bearer {token}"}
+    ).json()[0]
+    client.put(
+        f"/api/notes/{note['id']}",
+        json={"title": "meeting", "description": "discuss the roadmap", "tags": [], "done": False},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    for q, expected in (("budget", []), ("roadmap", ["meeting"]), ('"roadmap OR', [])):
+        response = client.get(
+            "/api/notes/search",
+            params={"q": q},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200, response.text
+        assert [n["title"] for n in response.json()] == expected
+
+
+def test_get_notes_by_tags(client, token):
+    alpha, beta = (
+        client.post(
+            "/api/tags",
+            json={"name": name},
+            headers={"Authorization": f"Bearer {token}"}
+        ).json()["id"]
+        for name in ("alpha", "beta")
+    )
+    client.post(
+        "/api/notes/bulk",
+        json=[
+            {"title": "only_alpha", "description": "tagged", "tags": [alpha]},
+            {"title": "only_beta", "description": "tagged", "tags": [beta]},
+            {"title": "alpha_beta", "description": "tagged", "tags": [alpha, beta]},
+        ],
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    for match, expected in (
+        ("any", ["only_alpha", "only_beta", "alpha_beta"]),
+        ("all", ["alpha_beta"]),
+    ):
+        response = client.get(
+            "/api/notes",
+            params={"tags": f"{alpha},{beta}", "match": match},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200, response.text
+        assert [note["title"] for note in response.json()] == expected
+
+    response = client.get(
+        "/api/notes",
+        params={"tags": f"{beta}", "after": "", "limit": 1},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [note["title"] for note in data["items"]] == ["only_beta"]
+    response = client.get(
+        "/api/notes",
+        params={"tags": f"{beta}", "after": data["next_cursor"], "limit": 1},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert [note["title"] for note in response.json()["items"]] == ["alpha_beta"]
+
+
+def test_get_notes_by_tags_invalid(client, token):
+    response = client.get(
+        "/api/notes",
+        params={"tags": "1,x"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 422, response.text
+
+
+def test_get_notes_rate_limited(client, token, limiter):
+    limiter.evalsha.return_value = [0, 10]
+    statuses = [
+        client.get("/api/notes", headers={"Authorization": f"Bearer {token}"}).status_code
+        for _ in range(7)
+    ]
+    assert statuses == [200] * 5 + [429] * 2
+    response = client.get("/api/notes", headers={"Authorization": f"Bearer {token}"})
+    assert response.json()["detail"] == "Too Many Requests"
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_get_notes_not_modified(client, token):
+    response = client.get("/api/notes", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    response = client.get(
+        "/api/notes",
+        headers={"Authorization": f"Bearer {token}", "If-None-Match": etag}
+    )
+    assert response.status_code == 304, response.text
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    client.post(
+        "/api/notes",
+        json={"title": "etag_note", "description": "changes the collection", "tags": []},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    response = client.get(
+        "/api/notes",
+        headers={"Authorization": f"Bearer {token}", "If-None-Match": etag}
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] != etag
+    assert "etag_note" in [note["title"] for note in response.json()]
+
+
+def test_get_notes_with_lagging_replica(client, token, lagging_replica):
+    with patch.multiple(response_cache, enabled=True, r=collection_versions.r):
+        response_cache.clear()
+        response = client.get("/api/notes", headers={"Authorization": f"Bearer {token}"})
+        etag = response.headers["ETag"]
+        client.post(
+            "/api/notes",
+            json={"title": "lagged_note", "description": "only on the primary", "tags": []},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        for _ in range(2):
+            response = client.get(
+                "/api/notes",
+                headers={"Authorization": f"Bearer {token}", "If-None-Match": etag}
+            )
+            assert response.status_code == 200, response.text
+            assert "lagged_note" in [note["title"] for note in response.json()]
+
+
+def test_get_notes_not_modified_after_tag_rename(client, token, tag_ids):
+    response = client.get("/api/notes", headers={"Authorization": f"Bearer {token}"})
+    etag = response.headers["ETag"]
+    client.put(
+        f"/api/tags/{tag_ids[0]}",
+        json={"name": "renamed"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    response = client.get(
+        "/api/notes",
+        headers={"Authorization": f"Bearer {token}", "If-None-Match": etag}
+    )
+    assert response.status_code == 200, response.text
+
+
+def test_get_notes_response_cache(client, token, queries):
+    with patch.multiple(response_cache, enabled=True, r=collection_versions.r):
+        response_cache.clear()
+        first = client.get("/api/notes", headers={"Authorization": f"Bearer {token}"})
+        assert first.status_code == 200, first.text
+        queries.clear()
+        second = client.get("/api/notes", headers={"Authorization": f"Bearer {token}"})
+        assert second.status_code == 200, second.text
+        assert second.content == first.content
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert not [sql for sql in queries if "FROM notes" in sql]
+        client.post(
+            "/api/notes",
+            json={"title": "cached_note", "description": "bumps the version", "tags": []},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        third = client.get("/api/notes", headers={"Authorization": f"Bearer {token}"})
+        assert "cached_note" in [note["title"] for note in third.json()]
+        assert response_cache.stats()["hits"] == 1
+        assert response_cache.stats()["misses"] == 2
+
+
+def test_export_notes(client, token, tag_ids):
+    client.post(
+        "/api/notes",
+        json={"title": "exported_note", "description": "with tags", "tags": tag_ids[:2]},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    listed = client.get(
+        "/api/notes", params={"limit": 1000}, headers={"Authorization": f"Bearer {token}"}
+    ).json()
+    with patch("src.routes.notes.EXPORT_BATCH_SIZE", 2):
+        response = client.get(
+            "/api/notes/export", headers={"Authorization": f"Bearer {token}"}
+        )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    exported = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [note["id"] for note in exported] == [note["id"] for note in listed]
+    note = next(note for note in exported if note["title"] == "exported_note")
+    assert [tag["id"] for tag in note["tags"]] == sorted(tag_ids[:2])
+
+
+def test_export_notes_gzip(client, token):
+    plain = client.get("/api/notes/export", headers={"Authorization": f"Bearer {token}"})
+    response = client.get(
+        "/api/notes/export",
+        params={"gzip": True},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/gzip"
+    assert gzip.decompress(response.content) == plain.content
+
+
+def test_import_notes(client, token):
+    body = b"\n".join([
+        b'{"title": "imported_1", "description": "new tags", "tags": ["import_a", "import_b"]}',
+        b'{"title": "imported_2", "description": "done", "done": true, "tags": ["import_a"]}',
+        b'not json',
+        b'',
+        b'{"title": "imported_3"}',
+        b'{"title": "imported_4", "description": "bad tag", "tags": [{"id": 1}]}',
+        b'{"title": "imported_5", "description": "after the bad tag", "tags": []}',
+    ])
+    with patch("src.routes.notes.IMPORT_BATCH_SIZE", 1):
+        response = client.post(
+            "/api/notes/import",
+            content=body,
+            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+        )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["imported"] == 3
+    assert data["failed"] == 3
+    assert [error["line"] for error in data["errors"]] == [3, 5, 6]
+    assert "description" in data["errors"][1]["error"]
+    assert "tags: tag objects need a string name" in data["errors"][2]["error"]
+    notes = client.get(
+        "/api/notes", params={"limit": 1000}, headers={"Authorization": f"Bearer {token}"}
+    ).json()
+    imported = {
+        note["title"]: note for note in notes if note["title"].startswith("imported_")
+    }
+    assert [tag["name"] for tag in imported["imported_1"]["tags"]] == ["import_a", "import_b"]
+    assert len({
+        tag["id"]
+        for note in imported.values()
+        for tag in note["tags"]
+        if tag["name"] == "import_a"
+    }) == 1
+    assert imported["imported_2"]["done"] is True
+
+
+def test_import_notes_csv(client, token):
+    body = (
+        "title,description,done,tags\r\n"
+        'csv_note,"quoted, with comma",true,import_a;csv_tag\r\n'
+        "csv_note_2,no tags,,\r\n"
+        "broken,line\r\n"
+    ).encode()
+    response = client.post(
+        "/api/notes/import",
+        content=body,
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["imported"] == 2
+    assert data["errors"] == [{"line": 4, "error": "expected 4 fields"}]
+    tags = client.get(
+        "/api/tags", params={"limit": 1000}, headers={"Authorization": f"Bearer {token}"}
+    ).json()
+    assert [tag["name"] for tag in tags].count("import_a") == 1
+    assert "csv_tag" in [tag["name"] for tag in tags]
+
+
+def test_import_exported_notes(client, token):
+    exported = client.get("/api/notes/export", headers={"Authorization": f"Bearer {token}"})
+    response = client.post(
+        "/api/notes/import",
+        content=exported.content,
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == len(exported.content.splitlines())
+    assert response.json()["failed"] == 0
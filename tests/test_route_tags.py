@@ -1,29 +1,10 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, patch
 
-import pytest
-
-from src.database.models import User
 from src.services.auth import auth_service
 
 
-@pytest.fixture()
-def token(client, user, session, monkeypatch):
-    mock_send_email = MagicMock()
-    monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
-    client.post("/api/auth/signup", json=user)
-    current_user: User = session.query(User).filter(User.email == user.get('email')).first()
-    current_user.confirmed = True
-    session.commit()
-    response = client.post(
-        "/api/auth/login",
-        data={"username": user.get('email'), "password": user.get('password')},
-    )
-    data = response.json()
-    return data["access_token"]
-
-
 def test_create_tag(client, token):
-    with patch.object(auth_service, 'r') as r_mock:
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
         r_mock.get.return_value = None
         response = client.post(
             "/api/tags",
@@ -37,7 +18,7 @@ def test_create_tag(client, token):
 
 
 def test_get_tag(client, token):
-    with patch.object(auth_service, 'r') as r_mock:
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
         r_mock.get.return_value = None
         response = client.get(
             "/api/tags/1",
@@ -50,7 +31,7 @@ def test_get_tag(client, token):
 
 
 def test_get_tag_not_found(client, token):
-    with patch.object(auth_service, 'r') as r_mock:
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
         r_mock.get.return_value = None
         response = client.get(
             "/api/tags/2",
@@ -62,7 +43,7 @@ def test_get_tag_not_found(client, token):
 
 
 def test_get_tags(client, token):
-    with patch.object(auth_service, 'r') as r_mock:
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
         r_mock.get.return_value = None
         response = client.get(
             "/api/tags",
@@ -76,7 +57,7 @@ def test_get_tags(client, token):
 
 
 def test_update_tag(client, token):
-    with patch.object(auth_service, 'r') as r_mock:
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
         r_mock.get.return_value = None
         response = client.put(
             "/api/tags/1",
@@ -90,7 +71,7 @@ def test_update_tag(client, token):
 
 
 def test_update_tag_not_found(client, token):
-    with patch.object(auth_service, 'r') as r_mock:
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
         r_mock.get.return_value = None
         response = client.put(
             "/api/tags/2",
@@ -103,7 +84,7 @@ def test_update_tag_not_found(client, token):
 
 
 def test_delete_tag(client, token):
-    with patch.object(auth_service, 'r') as r_mock:
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
         r_mock.get.return_value = None
         response = client.delete(
             "/api/tags/1",
@@ -116,7 +97,7 @@ def test_delete_tag(client, token):
 
 
 def test_repeat_delete_tag(client, token):
-    with patch.object(auth_service, 'r') as r_mock:
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
         r_mock.get.return_value = None
         response = client.delete(
             "/api/tags/1",
@@ -125,3 +106,87 @@ def test_repeat_delete_tag(client, token):
         assert response.status_code == 404, response.text
         data = response.json()
         assert data["detail"] == "Tag not found"
+
+
+def test_get_tags_cursor(client, token):
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
+        r_mock.get.return_value = None
+        for name in ("first_tag", "second_tag"):
+            client.post(
+                "/api/tags",
+                json={"name": name},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+        response = client.get(
+            "/api/tags",
+            params={"after": "", "limit": 1},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert [tag["name"] for tag in data["items"]] == ["first_tag"]
+        assert data["next_cursor"]
+        response = client.get(
+            "/api/tags",
+            params={"after": data["next_cursor"], "limit": 1},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert [tag["name"] for tag in data["items"]] == ["second_tag"]
+        assert data["next_cursor"] is None
+
+
+def test_get_tags_invalid_cursor(client, token):
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
+        r_mock.get.return_value = None
+        response = client.get(
+            "/api/tags",
+            params={"after": "not-a-cursor"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 400, response.text
+        data = response.json()
+        assert data["detail"] == "Invalid cursor"
+
+
+def test_get_tags_not_modified(client, token, versions):
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
+        r_mock.get.return_value = None
+        response = client.get("/api/tags", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200, response.text
+        etag = response.headers["ETag"]
+        response = client.get(
+            "/api/tags",
+            headers={"Authorization": f"Bearer {token}", "If-None-Match": etag}
+        )
+        assert response.status_code == 304, response.text
+        client.post(
+            "/api/tags",
+            json={"name": "etag_tag"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        response = client.get(
+            "/api/tags",
+            headers={"Authorization": f"Bearer {token}", "If-None-Match": etag}
+        )
+        assert response.status_code == 200, response.text
+        assert response.headers["ETag"] != etag
+
+
+def test_get_tags_with_lagging_replica(client, token, versions, lagging_replica):
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
+        r_mock.get.return_value = None
+        response = client.get("/api/tags", headers={"Authorization": f"Bearer {token}"})
+        etag = response.headers["ETag"]
+        client.post(
+            "/api/tags",
+            json={"name": "lagged_tag"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        response = client.get(
+            "/api/tags",
+            headers={"Authorization": f"Bearer {token}", "If-None-Match": etag}
+        )
+        assert response.status_code == 200, response.text
+        assert "lagged_tag" in [tag["name"] for tag in response.json()]
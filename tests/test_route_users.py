@@ -0,0 +1,82 @@
+import io
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from PIL import Image
+
+from src.services.auth import auth_service
+from src.services.storage import LocalStorage, avatar_storage
+
+
+def image_bytes(color):
+    out = io.BytesIO()
+    Image.new("RGB", (400, 300), color).save(out, "PNG")
+    return out.getvalue()
+
+
+@pytest.fixture()
+def storage(tmp_path):
+    backend = LocalStorage(tmp_path, "/media")
+    with patch.object(avatar_storage, "backend", backend):
+        yield backend
+
+
+def upload(client, token, data):
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
+        r_mock.get.return_value = None
+        return client.patch(
+            "/api/users/avatar",
+            files={"file": ("avatar.png", data, "image/png")},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+
+def test_read_users_me(client, token):
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
+        r_mock.get.return_value = None
+        response = client.get(
+            "/api/users/me/",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["username"] == "deadpool"
+
+
+def test_update_avatar(client, token, storage):
+    response = upload(client, token, image_bytes("red"))
+    assert response.status_code == 200, response.text
+    user = response.json()
+    assert user["avatar"].startswith(f"/media/NotesApp/{user['id']}/")
+    (path,) = storage.root.rglob("*.jpg")
+    with Image.open(path) as image:
+        assert image.size == (250, 250)
+
+
+def test_read_users_me_after_update_with_lagging_replica(
+    client, token, storage, lagging_replica
+):
+    avatar = upload(client, token, image_bytes("purple")).json()["avatar"]
+    with patch.object(auth_service, 'r', new_callable=AsyncMock) as r_mock:
+        r_mock.get.return_value = None
+        response = client.get(
+            "/api/users/me/",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    assert response.json()["avatar"] == avatar
+
+
+def test_update_avatar_same_image(client, token, storage):
+    first = upload(client, token, image_bytes("green")).json()["avatar"]
+    with patch.object(avatar_storage, "store", new_callable=AsyncMock) as store:
+        response = upload(client, token, image_bytes("green"))
+        assert response.status_code == 200, response.text
+        assert response.json()["avatar"] == first
+        store.assert_not_awaited()
+    response = upload(client, token, image_bytes("blue"))
+    assert response.json()["avatar"] != first
+
+
+def test_update_avatar_invalid_image(client, token, storage):
+    response = upload(client, token, b"not an image")
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Invalid image"
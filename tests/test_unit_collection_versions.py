@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import AsyncMock
+
+from redis.exceptions import ConnectionError
+
+from src.services.collection_versions import (
+    NOTES,
+    TAGS,
+    CollectionVersions,
+    etag_matches,
+)
+
+
+class TestCollectionVersions(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.r = AsyncMock()
+        self.versions = CollectionVersions(r=self.r)
+
+    async def test_get(self):
+        self.r.get.return_value = b"42"
+        self.assertEqual(await self.versions.get(NOTES, 1), 42)
+        self.r.get.assert_awaited_once_with("version:notes:1")
+
+    async def test_get_seeds_missing_counter(self):
+        self.r.get.side_effect = [None, b"1700000000000000000"]
+        self.assertEqual(await self.versions.get(NOTES, 1), 1700000000000000000)
+        self.r.set.assert_awaited_once()
+        self.assertTrue(self.r.set.await_args.kwargs["nx"])
+
+    async def test_get_redis_down(self):
+        self.r.get.side_effect = ConnectionError()
+        self.assertIsNone(await self.versions.get(NOTES, 1))
+        self.assertIsNone(await self.versions.etag(NOTES, 1))
+
+    async def test_bump(self):
+        self.r.incr.return_value = 43
+        await self.versions.bump(1, TAGS, NOTES)
+        self.assertEqual(
+            [call.args for call in self.r.incr.await_args_list],
+            [("version:tags:1",), ("version:notes:1",)],
+        )
+        self.r.set.assert_not_awaited()
+
+    async def test_bump_reseeds_lost_counter(self):
+        self.r.incr.return_value = 1
+        await self.versions.bump(1, NOTES)
+        self.r.set.assert_awaited_once()
+
+    async def test_bump_redis_down(self):
+        self.r.incr.side_effect = ConnectionError()
+        await self.versions.bump(1, NOTES)
+
+    async def test_etag(self):
+        self.r.get.return_value = b"42"
+        self.assertEqual(await self.versions.etag(NOTES, 1), 'W/"1-42"')
+
+
+class TestEtagMatches(unittest.TestCase):
+    def test_match(self):
+        self.assertTrue(etag_matches('W/"1-42"', 'W/"1-42"'))
+
+    def test_weak_comparison(self):
+        self.assertTrue(etag_matches('"1-42"', 'W/"1-42"'))
+
+    def test_list(self):
+        self.assertTrue(etag_matches('W/"1-41", W/"1-42"', 'W/"1-42"'))
+
+    def test_wildcard(self):
+        self.assertTrue(etag_matches("*", 'W/"1-42"'))
+
+    def test_no_match(self):
+        self.assertFalse(etag_matches('W/"1-41"', 'W/"1-42"'))
+        self.assertFalse(etag_matches(None, 'W/"1-42"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
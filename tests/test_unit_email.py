@@ -0,0 +1,185 @@
+import asyncio
+import unittest
+from email import message_from_bytes
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.database.models import Base, EmailOutbox
+from src.repository import emails as repository_emails
+from src.services.email import EmailWorker, SMTPSender, build_confirmation_email
+
+
+class SMTPStub:
+    """
+    Local SMTP stand-in that records the messages and connections it receives.
+    """
+
+    def __init__(self, reject=(), drop_after_message=False):
+        self.reject = set(reject)
+        self.drop_after_message = drop_after_message
+        self.messages = []
+        self.connections = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 stub ESMTP\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb == "RCPT" and command.split(":", 1)[1].strip("<> ") in self.reject:
+                writer.write(b"550 mailbox unavailable\r\n")
+            elif verb == "DATA":
+                writer.write(b"354 end data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                data = b""
+                while (line := await reader.readline()) != b".\r\n":
+                    data += line
+                self.messages.append(message_from_bytes(data))
+                writer.write(b"250 OK\r\n")
+                if self.drop_after_message:
+                    await writer.drain()
+                    break
+            elif verb == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            elif verb in ("EHLO", "HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                writer.write(b"250 OK\r\n")
+            else:
+                writer.write(b"502 not implemented\r\n")
+            await writer.drain()
+        writer.close()
+
+
+class TestEmailWorker(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(
+            self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self.smtp = SMTPStub(reject={"bounce@example.com"})
+        await self.smtp.start()
+        self.worker = self.make_worker()
+
+    async def asyncTearDown(self):
+        await self.worker.stop()
+        await self.smtp.stop()
+        await self.engine.dispose()
+
+    def make_worker(self, **kwargs):
+        sender = SMTPSender("127.0.0.1", self.smtp.port, use_tls=False)
+        return EmailWorker(sender, self.session_factory, batch_size=10, **kwargs)
+
+    async def queue(self, *recipients):
+        async with self.session_factory() as db:
+            for recipient in recipients:
+                await repository_emails.queue_confirmation_email(
+                    recipient, "deadpool", "http://testserver/", db
+                )
+
+    async def outbox(self):
+        async with self.session_factory() as db:
+            return list(await db.scalars(select(EmailOutbox).order_by(EmailOutbox.id)))
+
+    async def test_sends_batch_over_one_connection(self):
+        await self.queue("a@example.com", "b@example.com", "c@example.com")
+        self.assertEqual(await self.worker.run_once(), 3)
+        await self.queue("d@example.com")
+        self.assertEqual(await self.worker.run_once(), 1)
+        self.assertEqual(await self.worker.run_once(), 0)
+        self.assertEqual(
+            [message["To"] for message in self.smtp.messages],
+            ["a@example.com", "b@example.com", "c@example.com", "d@example.com"],
+        )
+        self.assertEqual(self.smtp.connections, 1)
+        for email in await self.outbox():
+            self.assertIsNotNone(email.sent_at)
+            self.assertIsNone(email.next_attempt_at)
+        self.assertEqual(self.worker.stats(), {"sent": 4, "failed": 0})
+
+    async def test_retries_with_backoff(self):
+        await self.queue("bounce@example.com", "a@example.com")
+        await self.worker.run_once()
+        bounced, sent = await self.outbox()
+        self.assertIsNone(bounced.sent_at)
+        self.assertEqual(bounced.attempts, 1)
+        self.assertIn("mailbox unavailable", bounced.last_error)
+        self.assertGreater(bounced.next_attempt_at, bounced.created_at)
+        self.assertIsNotNone(sent.sent_at)
+        self.assertEqual(await self.worker.run_once(), 0)
+
+    async def test_gives_up_after_max_attempts(self):
+        self.worker = self.make_worker(retry_after=0, max_attempts=2)
+        await self.queue("bounce@example.com")
+        await self.worker.run_once()
+        await self.worker.run_once()
+        (bounced,) = await self.outbox()
+        self.assertEqual(bounced.attempts, 2)
+        self.assertIsNone(bounced.next_attempt_at)
+        self.assertEqual(await self.worker.run_once(), 0)
+
+    async def test_crash_mid_batch_keeps_lease(self):
+        await self.queue("a@example.com", "b@example.com")
+        send = self.worker.sender.send
+
+        async def crash_on_second(message):
+            if message["To"] == "b@example.com":
+                raise RuntimeError("worker killed")
+            await send(message)
+
+        self.worker.sender.send = crash_on_second
+        with self.assertRaises(RuntimeError):
+            await self.worker.run_once()
+        sent, pending = await self.outbox()
+        self.assertIsNotNone(sent.sent_at)
+        self.assertIsNone(pending.sent_at)
+        self.assertGreaterEqual(
+            pending.next_attempt_at - pending.created_at, self.worker.lease
+        )
+        self.assertEqual(self.worker.lease.total_seconds(), 10 * 30)
+
+    async def test_reconnects_when_dropped(self):
+        self.smtp.drop_after_message = True
+        await self.queue("a@example.com", "b@example.com")
+        await self.worker.run_once()
+        self.assertEqual(len(self.smtp.messages), 2)
+        self.assertEqual(self.smtp.connections, 2)
+
+    async def test_run_wakes_up_on_notify(self):
+        self.worker = self.make_worker(poll_interval=60)
+        self.worker.start()
+        await asyncio.sleep(0.1)
+        await self.queue("a@example.com")
+        self.worker.notify()
+        for _ in range(50):
+            if self.smtp.messages:
+                break
+            await asyncio.sleep(0.05)
+        self.assertEqual(len(self.smtp.messages), 1)
+
+
+class TestConfirmationEmail(unittest.TestCase):
+    def test_build(self):
+        message = build_confirmation_email(
+            "deadpool@example.com", "deadpool", "http://testserver/"
+        )
+        self.assertEqual(message["To"], "deadpool@example.com")
+        body = message.get_content()
+        self.assertIn("Hi deadpool,", body)
+        self.assertIn("http://testserver/api/auth/confirmed_email/", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
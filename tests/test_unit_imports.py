@@ -0,0 +1,57 @@
+import unittest
+
+from src.services.imports import iter_lines, iter_records
+
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+class TestIterLines(unittest.IsolatedAsyncioTestCase):
+    async def test_lines_across_chunks(self):
+        lines = await collect(iter_lines(chunks(b"fir", b"st\r\nsec", b"ond\n", b"third")))
+        self.assertEqual(lines, [(1, b"first"), (2, b"second"), (3, b"third")])
+
+    async def test_trailing_newline(self):
+        lines = await collect(iter_lines(chunks(b"first\n")))
+        self.assertEqual(lines, [(1, b"first")])
+
+
+class TestIterRecords(unittest.IsolatedAsyncioTestCase):
+    async def test_ndjson(self):
+        records = await collect(
+            iter_records(chunks(b'{"title": "a"}\n\n[1]\n{'), is_csv=False)
+        )
+        self.assertEqual(records[0], (1, {"title": "a"}, None))
+        self.assertEqual(
+            [(line_no, record) for line_no, record, _ in records[1:]],
+            [(3, None), (4, None)],
+        )
+
+    async def test_csv(self):
+        records = await collect(
+            iter_records(
+                chunks(b"title,description,tags\n", b'a,"b, c",x;y\nd,,\n'),
+                is_csv=True,
+            )
+        )
+        self.assertEqual(
+            records,
+            [
+                (2, {"title": "a", "description": "b, c", "tags": ["x", "y"]}, None),
+                (3, {"title": "d"}, None),
+            ],
+        )
+
+    async def test_csv_invalid_encoding(self):
+        records = await collect(iter_records(chunks(b"title\n\xff\n"), is_csv=True))
+        self.assertEqual(records[0][:2], (2, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.db import InstrumentedPool, pool_stats
+from src.services.metrics import Histogram, render
+
+
+class TestHistogram(unittest.TestCase):
+    def test_stats(self):
+        histogram = Histogram([0.1, 1])
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+        stats = histogram.stats()
+        self.assertEqual(stats["buckets"], {0.1: 2, 1: 3, float("inf"): 4})
+        self.assertEqual(stats["count"], 4)
+        self.assertAlmostEqual(stats["sum"], 2.65)
+
+
+class TestRender(unittest.TestCase):
+    def test_render(self):
+        histogram = Histogram([0.1])
+        histogram.observe(0.05)
+        text = render(
+            {
+                "cache": {"hits": 3, "hit_ratio": 0.75, "enabled": True},
+                "db_pool": {"wait_seconds": histogram.stats()},
+            }
+        )
+        self.assertEqual(
+            text.splitlines(),
+            [
+                "cache_hits 3",
+                "cache_hit_ratio 0.75",
+                "cache_enabled 1",
+                "# TYPE db_pool_wait_seconds histogram",
+                'db_pool_wait_seconds_bucket{le="0.1"} 1',
+                'db_pool_wait_seconds_bucket{le="+Inf"} 1',
+                "db_pool_wait_seconds_sum 0.05",
+                "db_pool_wait_seconds_count 1",
+            ],
+        )
+
+
+class TestInstrumentedPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            "sqlite+aiosqlite://",
+            poolclass=InstrumentedPool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_stats(self):
+        async with self.engine.connect():
+            stats = pool_stats(self.engine.pool)
+            self.assertEqual(stats["size"], 1)
+            self.assertEqual(stats["checked_out"], 1)
+            with self.assertRaises(exc.TimeoutError):
+                async with self.engine.connect():
+                    pass
+        stats = pool_stats(self.engine.pool)
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["wait_seconds"]["count"], 2)
+        self.assertGreaterEqual(stats["wait_seconds"]["sum"], 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
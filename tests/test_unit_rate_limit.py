@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+
+from redis.exceptions import ConnectionError, NoScriptError
+
+from src.services.rate_limit import SLIDING_WINDOW, SLIDING_WINDOW_SHA, RateLimiter
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.r = AsyncMock()
+        self.r.evalsha.return_value = [1, 6]
+        self.limiter = RateLimiter(
+            {"notes:read": (10, 60)}, sync_below=0.5, timeout=0.05, r=self.r
+        )
+
+    async def hits(self, count, user_id=1):
+        return [await self.limiter.hit("notes:read", user_id) for _ in range(count)]
+
+    async def test_local_while_far_from_limit(self):
+        self.assertEqual(await self.hits(5), [0] * 5)
+        self.r.evalsha.assert_not_awaited()
+        self.assertEqual(self.limiter.stats()["local"], 5)
+
+    async def test_syncs_served_requests_near_limit(self):
+        await self.hits(6)
+        self.r.evalsha.assert_awaited_once()
+        args = self.r.evalsha.await_args.args
+        self.assertEqual(args[0], SLIDING_WINDOW_SHA)
+        self.assertEqual(args[1], 2)
+        self.assertTrue(args[2].startswith("ratelimit:{notes:read:1}:"))
+        limit, _, served, ttl = args[4:]
+        self.assertEqual((limit, served, ttl), (10, 5, 120000))
+        self.assertEqual(self.limiter.stats()["synced"], 1)
+        # the next sync only reports what was served since
+        await self.hits(1)
+        self.assertEqual(self.r.evalsha.await_args.args[6], 0)
+
+    async def test_users_have_separate_buckets(self):
+        await self.hits(5, user_id=1)
+        await self.hits(5, user_id=2)
+        self.r.evalsha.assert_not_awaited()
+
+    async def test_limited_by_redis(self):
+        await self.hits(5)
+        self.r.evalsha.return_value = [0, 10]
+        wait = await self.limiter.hit("notes:read", 1)
+        self.assertAlmostEqual(wait, 6)
+        # the bucket is empty now, so the next request is refused locally
+        self.r.evalsha.reset_mock()
+        self.assertGreater(await self.limiter.hit("notes:read", 1), 0)
+        self.r.evalsha.assert_not_awaited()
+        self.assertEqual(self.limiter.stats()["limited"], 2)
+
+    async def test_local_limit_without_redis(self):
+        self.r.evalsha.side_effect = ConnectionError()
+        waits = await self.hits(11)
+        self.assertEqual(waits[:10], [0] * 10)
+        self.assertGreater(waits[10], 0)
+        # Redis is only tried once and then left alone for retry_after
+        self.r.evalsha.assert_awaited_once()
+        self.assertEqual(self.limiter.stats()["redis_errors"], 1)
+
+    async def test_served_kept_after_redis_error(self):
+        self.r.evalsha.side_effect = ConnectionError()
+        await self.hits(6)
+        self.limiter.retry_after = 0
+        self.limiter._redis_down_until = 0
+        self.r.evalsha.side_effect = None
+        await self.hits(1)
+        self.assertEqual(self.r.evalsha.await_args.args[6], 6)
+
+    async def test_slow_redis(self):
+        async def slow(*args):
+            await asyncio.sleep(0.2)
+            return [1, 6]
+
+        self.r.evalsha.side_effect = slow
+        self.assertEqual(await self.hits(6), [0] * 6)
+        self.assertEqual(self.limiter.stats()["redis_errors"], 1)
+        await asyncio.sleep(0.3)
+
+    async def test_loads_missing_script(self):
+        self.r.evalsha.side_effect = NoScriptError()
+        self.r.eval.return_value = [1, 6]
+        await self.hits(6)
+        self.assertEqual(self.r.eval.await_args.args[0], SLIDING_WINDOW)
+        self.assertEqual(self.limiter.stats()["synced"], 1)
+
+    async def test_unconfigured_route(self):
+        self.assertEqual(await self.limiter.hit("tags:read", 1), 0)
+        self.assertEqual(self.limiter.stats()["buckets"], 0)
+
+    async def test_disabled(self):
+        self.limiter.enabled = False
+        self.assertEqual(await self.hits(20), [0] * 20)
+
+    async def test_buckets_bounded(self):
+        self.limiter.maxsize = 2
+        for user_id in range(5):
+            await self.limiter.hit("notes:read", user_id)
+        self.assertEqual(self.limiter.stats()["buckets"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
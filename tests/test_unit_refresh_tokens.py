@@ -0,0 +1,124 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError
+
+from src.services.auth import auth_service
+from src.services.refresh_tokens import (
+    REUSED,
+    ROTATED,
+    UNKNOWN,
+    LocalTokenStore,
+    RedisTokenStore,
+    RefreshTokens,
+    TokenStore,
+)
+
+
+class TestLocalTokenStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.store = LocalTokenStore()
+
+    def test_base_is_abstract(self):
+        with self.assertRaises(TypeError):
+            TokenStore()
+
+    async def test_rotate(self):
+        await self.store.create("f1", "deadpool@example.com", "a", 60)
+        self.assertEqual(await self.store.rotate("f1", "a", "b", 60), ROTATED)
+        self.assertEqual(await self.store.rotate("f1", "b", "c", 60), ROTATED)
+
+    async def test_reuse_revokes_family(self):
+        await self.store.create("f1", "deadpool@example.com", "a", 60)
+        await self.store.rotate("f1", "a", "b", 60)
+        self.assertEqual(await self.store.rotate("f1", "a", "c", 60), REUSED)
+        self.assertEqual(await self.store.rotate("f1", "b", "c", 60), UNKNOWN)
+
+    async def test_families_are_independent(self):
+        await self.store.create("f1", "deadpool@example.com", "a", 60)
+        await self.store.create("f2", "deadpool@example.com", "x", 60)
+        await self.store.revoke("f1")
+        self.assertEqual(await self.store.rotate("f1", "a", "b", 60), UNKNOWN)
+        self.assertEqual(await self.store.rotate("f2", "x", "y", 60), ROTATED)
+
+    async def test_expired(self):
+        await self.store.create("f1", "deadpool@example.com", "a", 0)
+        self.assertEqual(await self.store.rotate("f1", "a", "b", 60), UNKNOWN)
+
+
+class TestRedisTokenStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.r = MagicMock()
+        self.script = AsyncMock(return_value=1)
+        self.r.register_script.return_value = self.script
+        self.store = RedisTokenStore(self.r)
+
+    async def test_rotate_is_one_script_call(self):
+        self.assertEqual(await self.store.rotate("f1", "a", "b", 60), ROTATED)
+        self.script.assert_awaited_once_with(
+            keys=["refresh:f1"], args=["a", "b", 60]
+        )
+
+    async def test_create(self):
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        self.r.pipeline.return_value.__aenter__.return_value = pipe
+        await self.store.create("f1", "deadpool@example.com", "a", 60)
+        pipe.hset.assert_called_once_with(
+            "refresh:f1", mapping={"sub": "deadpool@example.com", "jti": "a"}
+        )
+        pipe.expire.assert_called_once_with("refresh:f1", 60)
+        pipe.execute.assert_awaited_once()
+
+    async def test_revoke(self):
+        self.r.delete = AsyncMock()
+        await self.store.revoke("f1")
+        self.r.delete.assert_awaited_once_with("refresh:f1")
+
+
+class TestRefreshTokens(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tokens = RefreshTokens(LocalTokenStore(), ttl=60)
+
+    async def test_issue_and_rotate(self):
+        family, token = await self.tokens.issue("deadpool@example.com")
+        email, new_family, new_token = await self.tokens.rotate(token)
+        self.assertEqual(email, "deadpool@example.com")
+        self.assertEqual(new_family, family)
+        old = await auth_service.decode_refresh_token(token)
+        new = await auth_service.decode_refresh_token(new_token)
+        self.assertEqual(new["fid"], old["fid"])
+        self.assertNotEqual(new["jti"], old["jti"])
+
+    async def test_reuse(self):
+        _, token = await self.tokens.issue("deadpool@example.com")
+        _, _, new_token = await self.tokens.rotate(token)
+        for presented in (token, new_token):
+            with self.assertRaises(HTTPException) as cm:
+                await self.tokens.rotate(presented)
+            self.assertEqual(cm.exception.detail, "Invalid refresh token")
+        self.assertEqual(self.tokens.stats(), {"rotated": 1, "reused": 1})
+
+    async def test_token_without_family(self):
+        token = await auth_service.create_refresh_token({"sub": "deadpool@example.com"})
+        with self.assertRaises(HTTPException) as cm:
+            await self.tokens.rotate(token)
+        self.assertEqual(cm.exception.status_code, 401)
+
+    async def test_revoke(self):
+        family, token = await self.tokens.issue("deadpool@example.com")
+        await self.tokens.revoke(family)
+        with self.assertRaises(HTTPException):
+            await self.tokens.rotate(token)
+
+    async def test_store_unavailable(self):
+        self.tokens.store = AsyncMock()
+        self.tokens.store.create.side_effect = ConnectionError()
+        with self.assertRaises(HTTPException) as cm:
+            await self.tokens.issue("deadpool@example.com")
+        self.assertEqual(cm.exception.status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.database.db import ReplicaSession, ReplicaSet, get_read_db
+
+
+def session_factory():
+    return MagicMock(return_value=AsyncMock(spec=AsyncSession))
+
+
+class TestReplicaSet(unittest.IsolatedAsyncioTestCase):
+    def test_round_robin(self):
+        factories = [session_factory(), session_factory()]
+        replicas = ReplicaSet(factories, retry_after=30)
+        sessions = [replicas.session() for _ in range(3)]
+        self.assertIs(sessions[0], factories[0].return_value)
+        self.assertIs(sessions[1], factories[1].return_value)
+        self.assertIs(sessions[2], factories[0].return_value)
+
+    def test_does_not_connect(self):
+        factories = [session_factory()]
+        session = ReplicaSet(factories, retry_after=30).session()
+        session.connection.assert_not_called()
+
+    def test_skips_replica_marked_down(self):
+        factories = [session_factory(), session_factory()]
+        replicas = ReplicaSet(factories, retry_after=30)
+        with patch("src.database.db.time.monotonic", return_value=0):
+            replicas.mark_down(0)
+            self.assertIs(replicas.session(), factories[1].return_value)
+            self.assertIs(replicas.session(), factories[1].return_value)
+        with patch("src.database.db.time.monotonic", return_value=31):
+            self.assertIs(replicas.session(), factories[0].return_value)
+        self.assertEqual(factories[0].call_count, 1)
+
+    def test_all_replicas_down(self):
+        replicas = ReplicaSet([session_factory()], retry_after=30)
+        replicas.mark_down(0)
+        self.assertIsNone(replicas.session())
+
+    def test_no_replicas(self):
+        self.assertIsNone(ReplicaSet([], retry_after=30).session())
+
+    async def test_marked_down_on_connect_failure(self):
+        replicas = ReplicaSet([session_factory()], retry_after=30)
+        engine = create_async_engine("sqlite+aiosqlite:////nonexistent/replica.db")
+        event.listen(engine.sync_engine, "handle_error", replicas.handle_error(0))
+        with self.assertRaises(Exception):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        self.assertIsNone(replicas.session())
+        await engine.dispose()
+
+    async def test_not_marked_down_on_query_error(self):
+        replicas = ReplicaSet([session_factory()], retry_after=30)
+        engine = create_async_engine("sqlite+aiosqlite://")
+        event.listen(engine.sync_engine, "handle_error", replicas.handle_error(0))
+        with self.assertRaises(Exception):
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT * FROM missing"))
+        self.assertIsNotNone(replicas.session())
+        await engine.dispose()
+
+
+class TestReplicaSession(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.primary_engine = create_async_engine("sqlite+aiosqlite://")
+        self.primary = AsyncSession(self.primary_engine)
+        self.replicas = ReplicaSet([session_factory()], retry_after=30)
+
+    async def asyncTearDown(self):
+        await self.primary.close()
+        await self.primary_engine.dispose()
+        await self.replica_engine.dispose()
+
+    def replica_session(self, url: str) -> ReplicaSession:
+        self.replica_engine = create_async_engine(url)
+        event.listen(
+            self.replica_engine.sync_engine,
+            "handle_error",
+            self.replicas.handle_error(0),
+        )
+        session = async_sessionmaker(self.replica_engine, class_=ReplicaSession)()
+        session.primary = self.primary
+        return session
+
+    async def test_fails_over_to_primary(self):
+        replica = self.replica_session("sqlite+aiosqlite:////nonexistent/replica.db")
+        async with replica:
+            self.assertEqual(await replica.scalar(text("SELECT 1")), 1)
+            self.assertTrue(replica.failed_over)
+            result = await replica.execute(text("SELECT 2"))
+            self.assertEqual(result.scalar(), 2)
+        self.assertIsNone(self.replicas.session())
+
+    async def test_query_error_is_not_retried(self):
+        replica = self.replica_session("sqlite+aiosqlite://")
+        async with replica:
+            with self.assertRaises(exc.OperationalError):
+                await replica.execute(text("SELECT * FROM missing"))
+            self.assertFalse(replica.failed_over)
+        self.assertIsNotNone(self.replicas.session())
+
+
+class TestGetReadDb(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.primary = MagicMock(spec=AsyncSession)
+        self.replica = AsyncMock(spec=ReplicaSession)
+
+    async def read_db(self):
+        dependency = get_read_db(self.primary)
+        db = await anext(dependency)
+        await dependency.aclose()
+        return db
+
+    async def test_replica(self):
+        with patch(
+            "src.database.db.replicas.session", MagicMock(return_value=self.replica)
+        ):
+            self.assertIs(await self.read_db(), self.replica)
+        self.assertIs(self.replica.primary, self.primary)
+        self.replica.__aexit__.assert_awaited()
+        self.replica.connection.assert_not_called()
+
+    async def test_primary_without_replica(self):
+        with patch("src.database.db.replicas.session", MagicMock(return_value=None)):
+            self.assertIs(await self.read_db(), self.primary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.database.models import Base, EmailOutbox
+from src.repository.emails import add_confirmation_email
+from src.repository.users import create_user
+from src.schemas import UserModel
+
+
+class TestCreateUser(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(
+            self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        self.body = UserModel(
+            username="deadpool", email="deadpool@example.com", password="123456789"
+        )
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_create_user(self):
+        async with self.session_factory() as db:
+            user = await create_user(self.body, db)
+        self.assertIsNotNone(user.id)
+        self.assertEqual(user.email, "deadpool@example.com")
+        self.assertFalse(user.confirmed)
+        self.assertIsNotNone(user.created_at)
+        self.assertIn("gravatar", user.avatar)
+
+    async def test_create_existing_user(self):
+        async with self.session_factory() as db:
+            await create_user(self.body, db)
+        async with self.session_factory() as db:
+            add_confirmation_email(self.body.email, "deadpool", "http://testserver/", db)
+            self.assertIsNone(await create_user(self.body, db))
+            # the session is still usable and the caller's additions are gone
+            count = await db.scalar(select(func.count()).select_from(EmailOutbox))
+        self.assertEqual(count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
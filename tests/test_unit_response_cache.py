@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import Response
+from redis.exceptions import ConnectionError
+
+from src.services.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.r = AsyncMock()
+        self.cache = ResponseCache(enabled=True, ttl=60, max_bytes=16, r=self.r)
+        self.request = MagicMock()
+        self.request.query_params.multi_items.return_value = [("limit", "10")]
+        self.response = Response()
+        self.response.headers["ETag"] = 'W/"1-42"'
+
+    def test_key(self):
+        key = self.cache.key("notes", self.request, self.response)
+        self.assertTrue(key.startswith("response:notes:"))
+        self.response.headers["ETag"] = 'W/"1-43"'
+        self.assertNotEqual(self.cache.key("notes", self.request, self.response), key)
+
+    def test_key_disabled(self):
+        self.cache.enabled = False
+        self.assertIsNone(self.cache.key("notes", self.request, self.response))
+
+    def test_key_without_etag(self):
+        self.assertIsNone(self.cache.key("notes", self.request, Response()))
+
+    async def test_get_hit(self):
+        self.r.get.return_value = b"[]"
+        self.assertEqual(await self.cache.get("key"), b"[]")
+        self.assertEqual(self.cache.stats()["hit_ratio"], 1.0)
+
+    async def test_get_redis_down(self):
+        self.r.get.side_effect = ConnectionError()
+        self.assertIsNone(await self.cache.get("key"))
+        self.assertEqual(self.cache.misses, 1)
+
+    async def test_set(self):
+        await self.cache.set("key", b"[]")
+        self.r.set.assert_awaited_once_with("key", b"[]", ex=60)
+
+    async def test_set_too_large(self):
+        await self.cache.set("key", b"[" + b"1," * 16 + b"1]")
+        self.r.set.assert_not_awaited()
+        self.assertEqual(self.cache.too_large, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError
+
+from src.services.revocations import REVOCATION_CHANNEL, BloomFilter, Revocations
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f"jti{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        self.assertEqual(bloom.count, 1000)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f"jti{i}")
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+
+class TestRevocations(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.r = MagicMock()
+        self.r.exists = AsyncMock(return_value=1)
+        self.r.zrangebyscore = AsyncMock(return_value=[])
+        self.pipe = MagicMock()
+        self.pipe.execute = AsyncMock()
+        self.r.pipeline.return_value.__aenter__.return_value = self.pipe
+        self.revocations = Revocations(1000, 0.001, 60, r=self.r)
+
+    async def test_not_revoked_without_round_trip(self):
+        self.assertFalse(await self.revocations.is_revoked("a"))
+        self.r.exists.assert_not_awaited()
+
+    async def test_revoke(self):
+        exp = time.time() + 60
+        await self.revocations.revoke("a", exp)
+        self.pipe.set.assert_called_once_with("revoked:a", 1, ex=60)
+        self.pipe.zadd.assert_called_once_with("revocations", {"a": exp})
+        self.pipe.publish.assert_called_once_with(REVOCATION_CHANNEL, "a")
+        self.assertTrue(await self.revocations.is_revoked("a"))
+        self.r.exists.assert_awaited_once_with("revoked:a")
+        self.assertEqual(self.revocations.stats()["revoked"], 1)
+
+    async def test_revoke_expired_token(self):
+        await self.revocations.revoke("a", time.time() - 1)
+        self.pipe.execute.assert_not_awaited()
+        self.assertFalse(await self.revocations.is_revoked("a"))
+
+    async def test_revoke_redis_down(self):
+        self.pipe.execute.side_effect = ConnectionError()
+        with self.assertRaises(HTTPException) as cm:
+            await self.revocations.revoke("a", time.time() + 60)
+        self.assertEqual(cm.exception.status_code, 503)
+
+    async def test_filter_false_positive_confirmed_in_redis(self):
+        self.revocations.filter.add("a")
+        self.r.exists.return_value = 0
+        self.assertFalse(await self.revocations.is_revoked("a"))
+        self.assertEqual(self.revocations.stats()["filter_hits"], 1)
+
+    async def test_filter_hit_with_redis_down(self):
+        self.revocations.filter.add("a")
+        self.r.exists.side_effect = ConnectionError()
+        self.assertTrue(await self.revocations.is_revoked("a"))
+
+    async def test_sync_rebuilds_filter(self):
+        self.revocations.filter.add("expired")
+        self.r.zrangebyscore.return_value = [b"a", b"b"]
+        await self.revocations.sync()
+        self.assertIn("a", self.revocations.filter)
+        self.assertIn("b", self.revocations.filter)
+        self.assertNotIn("expired", self.revocations.filter)
+
+    async def test_sync_keeps_revocations_received_meanwhile(self):
+        async def zrangebyscore(*args):
+            # published by another worker while the set is being read
+            self.revocations._add("c")
+            return [b"a"]
+
+        self.r.zrangebyscore.side_effect = zrangebyscore
+        await self.revocations.sync()
+        self.assertIn("a", self.revocations.filter)
+        self.assertIn("c", self.revocations.filter)
+
+
+if __name__ == "__main__":
+    unittest.main()
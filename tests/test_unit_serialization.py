@@ -0,0 +1,69 @@
+import unittest
+from datetime import datetime
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import parse_obj_as
+
+from src.database.models import Note, Tag
+from src.schemas import NoteResponse, TagResponse
+from src.services.serialization import dump_notes, dump_page, dump_tags, note_to_dict
+
+
+def validated(model, content) -> bytes:
+    # what FastAPI sends for a route declaring ``response_model=model``
+    return JSONResponse(jsonable_encoder(parse_obj_as(model, content))).body
+
+
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        self.tags = [Tag(id=1, name="work"), Tag(id=2, name="home")]
+        self.notes = [
+            Note(
+                id=1,
+                title="note",
+                description="with tags",
+                done=True,
+                created_at=datetime(2023, 3, 1, 12, 30, 15),
+                tags=self.tags,
+            ),
+            Note(
+                id=2,
+                title="ünïcode",
+                description="no tags",
+                done=None,
+                created_at=datetime(2023, 3, 1, 12, 30, 15, 123456),
+                tags=[],
+            ),
+        ]
+
+    def test_dump_notes(self):
+        self.assertEqual(
+            orjson.loads(dump_notes(self.notes)),
+            orjson.loads(validated(List[NoteResponse], self.notes)),
+        )
+
+    def test_dump_notes_same_key_order(self):
+        self.assertEqual(
+            list(orjson.loads(dump_notes(self.notes))[0]),
+            list(orjson.loads(validated(List[NoteResponse], self.notes))[0]),
+        )
+
+    def test_dump_tags(self):
+        self.assertEqual(
+            dump_tags(self.tags), validated(List[TagResponse], self.tags)
+        )
+
+    def test_dump_page(self):
+        body = dump_page([note_to_dict(note) for note in self.notes], "cursor")
+        data = orjson.loads(body)
+        self.assertEqual(data["next_cursor"], "cursor")
+        self.assertEqual(
+            data["items"], orjson.loads(validated(List[NoteResponse], self.notes))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
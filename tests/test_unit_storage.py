@@ -0,0 +1,112 @@
+import io
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from fastapi import HTTPException
+from PIL import Image
+
+from src.services.storage import (
+    AvatarStorage,
+    LocalStorage,
+    Storage,
+    make_thumbnail,
+)
+
+
+def image_bytes(size=(800, 600), mode="RGB", fmt="JPEG", color="red"):
+    out = io.BytesIO()
+    Image.new(mode, size, color).save(out, fmt)
+    return out.getvalue()
+
+
+class UploadStub:
+    def __init__(self, data):
+        self.file = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        return self.file.read(size)
+
+
+class TestThumbnail(unittest.TestCase):
+    def test_crops_and_scales_to_square_jpeg(self):
+        thumbnail = make_thumbnail(image_bytes((800, 600)), 250)
+        with Image.open(io.BytesIO(thumbnail)) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (250, 250))
+
+    def test_flattens_transparency(self):
+        data = image_bytes((300, 300), mode="RGBA", fmt="PNG", color=(0, 0, 0, 0))
+        with Image.open(io.BytesIO(make_thumbnail(data, 50))) as image:
+            self.assertEqual(image.mode, "RGB")
+            self.assertEqual(image.getpixel((25, 25)), (255, 255, 255))
+
+    def test_invalid_image(self):
+        with self.assertRaises(ValueError):
+            make_thumbnail(b"not an image", 250)
+
+
+class TestStorage(unittest.TestCase):
+    def test_base_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Storage()
+
+
+class TestAvatarStorage(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.backend = LocalStorage(self.tmp.name, "/media/")
+        self.storage = AvatarStorage(self.backend, 250, 1024 * 1024, workers=1)
+
+    def tearDown(self):
+        self.storage.executor.shutdown()
+        self.tmp.cleanup()
+
+    async def test_read_hashes_content(self):
+        data = image_bytes()
+        content, digest = await self.storage.read(UploadStub(data))
+        self.assertEqual(content, data)
+        _, other = await self.storage.read(UploadStub(image_bytes(color="blue")))
+        self.assertNotEqual(digest, other)
+
+    async def test_read_too_large(self):
+        self.storage.max_bytes = 10
+        with self.assertRaises(HTTPException) as cm:
+            await self.storage.read(UploadStub(image_bytes()))
+        self.assertEqual(cm.exception.status_code, 413)
+
+    async def test_store(self):
+        key = self.storage.key(1, "ab" * 32)
+        url = await self.storage.store(key, image_bytes())
+        self.assertEqual(url, f"/media/NotesApp/1/{'ab' * 16}.jpg")
+        with Image.open(self.backend.path(key)) as image:
+            self.assertEqual(image.size, (250, 250))
+
+    async def test_store_skips_existing_key(self):
+        key = self.storage.key(1, "ab" * 32)
+        await self.storage.store(key, image_bytes())
+        mtime = self.backend.path(key).stat().st_mtime_ns
+        await self.storage.store(key, image_bytes(color="blue"))
+        self.assertEqual(self.backend.path(key).stat().st_mtime_ns, mtime)
+
+    def test_key_outside_root(self):
+        with self.assertRaises(ValueError):
+            self.backend.path("NotesApp/../../../x")
+        with self.assertRaises(ValueError):
+            self.backend.put("/tmp/x", image_bytes())
+
+    async def test_store_invalid_image(self):
+        with self.assertRaises(HTTPException) as cm:
+            await self.storage.store("NotesApp/1/x", b"not an image")
+        self.assertEqual(cm.exception.status_code, 400)
+
+    async def test_store_backend_failure(self):
+        self.storage.backend = MagicMock()
+        self.storage.backend.put.side_effect = OSError("disk full")
+        with self.assertRaises(HTTPException) as cm:
+            await self.storage.store("NotesApp/1/x", image_bytes())
+        self.assertEqual(cm.exception.status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()
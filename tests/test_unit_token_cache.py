@@ -0,0 +1,38 @@
+import time
+import unittest
+
+from src.services.token_cache import TokenCache
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = TokenCache(maxsize=2)
+        self.claims = {"sub": "deadpool@example.com", "exp": time.time() + 60}
+
+    def test_hit(self):
+        self.cache.set("token", self.claims)
+        self.assertEqual(self.cache.get("token"), self.claims)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get("token"))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_expired_token(self):
+        self.cache.set("token", {"sub": "deadpool@example.com", "exp": time.time() - 1})
+        self.assertIsNone(self.cache.get("token"))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_token_without_exp_not_cached(self):
+        self.cache.set("token", {"sub": "deadpool@example.com"})
+        self.assertIsNone(self.cache.get("token"))
+
+    def test_bounded(self):
+        for token in ("a", "b", "c"):
+            self.cache.set(token, self.claims)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["size"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
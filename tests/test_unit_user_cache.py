@@ -0,0 +1,116 @@
+import pickle
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+from redis.exceptions import ConnectionError
+
+from src.database.models import User
+from src.services.user_cache import (
+    CachedUser,
+    UserCache,
+    INVALIDATION_CHANNEL,
+    decode_user,
+    encode_user,
+)
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.r = AsyncMock()
+        self.cache = UserCache(maxsize=2, ttl=60, r=self.r)
+
+    def test_get_miss(self):
+        self.assertIsNone(self.cache.get("a@example.com"))
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_get_hit(self):
+        user = object()
+        self.cache.set("a@example.com", user)
+        self.assertIs(self.cache.get("a@example.com"), user)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_expired_entry(self):
+        with patch("src.services.user_cache.time.monotonic", return_value=0):
+            self.cache.set("a@example.com", object())
+        with patch("src.services.user_cache.time.monotonic", return_value=61):
+            self.assertIsNone(self.cache.get("a@example.com"))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set("a@example.com", 1)
+        self.cache.set("b@example.com", 2)
+        self.cache.get("a@example.com")
+        self.cache.set("c@example.com", 3)
+        self.assertIsNone(self.cache.get("b@example.com"))
+        self.assertEqual(self.cache.get("a@example.com"), 1)
+        self.assertEqual(self.cache.get("c@example.com"), 3)
+
+    async def test_invalidate(self):
+        self.cache.set("a@example.com", 1)
+        await self.cache.invalidate("a@example.com")
+        self.assertIsNone(self.cache.get("a@example.com"))
+        self.r.delete.assert_awaited_once_with("user:a@example.com")
+        self.r.publish.assert_awaited_once_with(INVALIDATION_CHANNEL, "a@example.com")
+
+    async def test_invalidate_redis_down(self):
+        self.r.delete.side_effect = ConnectionError()
+        self.cache.set("a@example.com", 1)
+        await self.cache.invalidate("a@example.com")
+        self.assertIsNone(self.cache.get("a@example.com"))
+
+    def test_stats(self):
+        self.cache.set("a@example.com", 1)
+        self.cache.get("a@example.com")
+        self.cache.get("b@example.com")
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+
+class TestCachedUserCodec(unittest.TestCase):
+    def setUp(self):
+        self.user = User(
+            id=1,
+            username="deadpool",
+            email="deadpool@example.com",
+            password="hash",
+            refresh_token="token",
+            avatar="https://example.com/avatar.png",
+            confirmed=True,
+            created_at=datetime(2023, 3, 1, 12, 30, 15, 123456),
+        )
+
+    def test_round_trip(self):
+        user = decode_user(encode_user(CachedUser.from_user(self.user)))
+        for field in CachedUser.__slots__:
+            self.assertEqual(getattr(user, field), getattr(self.user, field))
+
+    def test_secrets_not_encoded(self):
+        data = encode_user(CachedUser.from_user(self.user))
+        self.assertNotIn(b"hash", data)
+        self.assertNotIn(b"token", data)
+
+    def test_other_version(self):
+        self.assertIsNone(decode_user(b'[0, 1, "deadpool"]'))
+
+    def test_malformed(self):
+        for data in (
+            b"[]",
+            b"[1]",
+            b'[1, 1, "deadpool", "deadpool@example.com", null, true]',
+            b'[1, 1, "deadpool", "deadpool@example.com", null, true, null, 0]',
+            b'[1, 1, "deadpool", "deadpool@example.com", null, true, "yesterday"]',
+            b'[1, 1, "deadpool", "deadpool@example.com", null, true, 0]',
+            b'{"id": 1}',
+        ):
+            self.assertIsNone(decode_user(data), data)
+
+    def test_legacy_pickle(self):
+        self.assertIsNone(decode_user(pickle.dumps({"id": 1})))
+
+
+if __name__ == "__main__":
+    unittest.main()